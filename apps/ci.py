@@ -19,13 +19,11 @@ class ci(Application):
             self.logger.debug("ci app got Task: " + str(task))
 
             if task["type"] == "gNMI notification" and task["source"] == "realnet":
-                # if the gNMI data diff contains a value_change and the second item in the diff is fuzz_me
-                if (
-                    task.get("diff")
-                    and task["diff"].get("values_changed")
-                    and task["diff"]["values_changed"].items[1].t2 == "fuzz_me"
+                # if the gNMI data patch contains a change to fuzz_me
+                if task.get("patch") and any(
+                    change.get("value") == "fuzz_me" for change in task["patch"]
                 ):
-                    # self.logger.debug("gNMI data changed: " + str(task['diff']['values_changed']))
+                    # self.logger.debug("gNMI data changed: " + str(task['patch']))
                     self.logger.info(
                         f"Sibling {sibling} detected gNMI notification 'fuzz_me', asking sec"
                         "app to run fuzzer..."
@@ -0,0 +1,43 @@
+from enum import Enum
+from pydantic import BaseModel
+
+
+class Encoding(str, Enum):
+    """
+    Enum for the encoding of broker messages
+
+    Attributes:
+        JSON (str): JSON, readable and always available
+        MSGPACK (str): MessagePack, compact binary encoding, requires the msgpack package
+    """
+
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+class Compression(str, Enum):
+    """
+    Enum for the compression of broker messages
+
+    Attributes:
+        NONE (str): no compression
+        ZLIB (str): zlib compression
+    """
+
+    NONE = "none"
+    ZLIB = "zlib"
+
+
+class CodecSettings(BaseModel):
+    """
+    Configuration for the wire codec of broker messages
+
+    Attributes:
+        encoding (Encoding): encoding of published messages, received messages are decoded according to their envelope
+        compression (Compression): compression of published messages
+        compression_threshold (int): minimum size in bytes of an encoded message to compress it
+    """
+
+    encoding: Encoding = Encoding.JSON
+    compression: Compression = Compression.NONE
+    compression_threshold: int = 1024
@@ -1,5 +1,7 @@
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
+from config.codec import CodecSettings
 
 
 class OffsetResetType(str, Enum):
@@ -16,17 +18,67 @@ class OffsetResetType(str, Enum):
     LATEST = "latest"
 
 
+class CompressionType(str, Enum):
+    """
+    Enum for the compression of message batches
+
+    Attributes:
+        NONE (str): no compression
+        GZIP (str): gzip compression
+        SNAPPY (str): snappy compression
+        LZ4 (str): lz4 compression
+        ZSTD (str): zstd compression
+    """
+
+    NONE = "none"
+    GZIP = "gzip"
+    SNAPPY = "snappy"
+    LZ4 = "lz4"
+    ZSTD = "zstd"
+
+
+class ProducerConfig(BaseModel):
+    """
+    Configuration for Kafka Producers
+
+    Attributes:
+        linger_ms (int): time in milliseconds to wait for more messages before a batch is sent
+        batch_size (int): maximum size of a batch in bytes
+        compression_type (CompressionType): compression of batches
+        poll_interval (float): interval in seconds of the background thread serving delivery callbacks
+        flush_timeout (float): maximum time in seconds to wait for outstanding deliveries on flush
+        queue_max_messages (int): maximum number of messages buffered by the producer of a process
+        queue_max_kbytes (int): maximum size in kilobytes of the messages buffered by the producer of a process
+    """
+
+    linger_ms: int = 5
+    batch_size: int = 1000000
+    compression_type: CompressionType = CompressionType.NONE
+    poll_interval: float = 0.1
+    flush_timeout: float = 10
+    queue_max_messages: int = 100000
+    queue_max_kbytes: int = 65536
+
+
 class TopicsConfig(BaseModel):
     """
     Configuration for Kafka Topics
 
     Attributes:
-        num_partitions (int): number of partitions
+        num_partitions (int): number of partitions, the minimum if nodes_per_partition is set
         replication_factor (int): replication factor
+        nodes_per_partition (Optional[int]): choose the number of partitions based on the number of nodes in the
+            topology, messages are keyed by node, so the nodes are spread over the partitions
+        max_partitions (int): maximum number of partitions chosen based on the number of nodes
+        delete_on_close (bool): delete the topics when DigSiNet stops, keep them to resume from the committed
+            offsets of the consumer groups after a restart
     """
 
-    num_partitions: int
+    num_partitions: int = Field(1, ge=1)
     replication_factor: int
+    nodes_per_partition: Optional[int] = Field(None, ge=1)
+    max_partitions: int = Field(64, ge=1)
+    delete_on_close: bool = True
 
 
 class OffsetConfig(BaseModel):
@@ -40,6 +92,22 @@ class OffsetConfig(BaseModel):
     reset_type: OffsetResetType
 
 
+class ConsumerConfig(BaseModel):
+    """
+    Configuration for Kafka Consumers
+
+    Attributes:
+        group_prefix (str): prefix of the consumer group ids
+        stable_groups (bool): use the same consumer group for a channel and purpose (e.g., the tasks of a sibling)
+            across runs, so consumers resume from the last committed offset instead of reading the topic from the
+            offset reset type, otherwise the consumer groups are unique per run. Resuming after a restart requires
+            the topics to be kept (see delete_on_close), the offsets of recreated topics are reset.
+    """
+
+    group_prefix: str = "digsinet"
+    stable_groups: bool = True
+
+
 class KafkaSettings(BaseModel):
     """
     Configuration for Kafka
@@ -49,12 +117,18 @@ class KafkaSettings(BaseModel):
         port (int): port of the Kafka server
         topics (TopicsConfig): configuration for Kafka topics
         offset (OffsetConfig): configuration for Kafka offsets
+        producer (ProducerConfig): configuration for Kafka producers
+        consumer (ConsumerConfig): configuration for Kafka consumers
+        codec (CodecSettings): wire codec of the messages
     """
 
     host: str
     port: int
     topics: TopicsConfig
     offset: OffsetConfig
+    producer: ProducerConfig = Field(default_factory=ProducerConfig)
+    consumer: ConsumerConfig = Field(default_factory=ConsumerConfig)
+    codec: CodecSettings = Field(default_factory=CodecSettings)
 
     class Config:
         use_enum_values = True
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from config.codec import CodecSettings
+
+
+class LocalSettings(BaseModel):
+    """
+    Settings for the local broker, passing messages between the processes of a single host without a broker server.
+
+    Attributes:
+        max_queue_size (int): Maximum number of messages buffered per channel, 0 for no limit.
+        publish_timeout (float): Maximum time in seconds to wait for space in a full channel before dropping a message.
+        codec (CodecSettings): Wire codec of the messages.
+    """
+    max_queue_size: int = Field(0, ge=0)
+    publish_timeout: float = 10
+    codec: CodecSettings = Field(default_factory=CodecSettings)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from config.codec import CodecSettings
 
 
 class RabbitSettings(BaseModel):
@@ -10,9 +11,19 @@ class RabbitSettings(BaseModel):
         port (int): Port where RabbitMQ listens. Defaults to 5672.
         username (str): RabbitMQ username.
         password (str): RabbitMQ password.
+        confirm_batch_size (int): Number of published messages after which their publisher confirms are awaited.
+        confirm_timeout (float): Maximum time in seconds to wait for publisher confirms.
+        reconnect_max_retries (int): Number of attempts to reconnect a lost publisher connection.
+        prefetch_count (int): Maximum number of unacknowledged messages delivered to a consumer.
+        codec (CodecSettings): Wire codec of the messages.
     """
     host: str
     port: int = 5672
     username: str
     password: str
+    confirm_batch_size: int = 100
+    confirm_timeout: float = 10
+    reconnect_max_retries: int = 5
+    prefetch_count: int = 100
+    codec: CodecSettings = Field(default_factory=CodecSettings)
 
@@ -6,11 +6,24 @@ Configuration file used by DigSiNet.
 """
 
 from dataclasses import dataclass
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Union
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional, Dict, Union, Pattern
 from config.kafka import KafkaSettings
 from config.rabbit import RabbitSettings
+from config.local import LocalSettings
 import yaml
+import re
+
+
+def compile_regex(pattern: str) -> Pattern:
+    """
+    Compiles a regex of the configuration, reporting invalid regexes as validation errors.
+    """
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"invalid regex '{pattern}': {e}")
 
 
 class TopologyType(BaseModel):
@@ -33,9 +46,16 @@ class TopologyAdjustmentRemove(BaseModel):
 
     Attributes:
         node_name (str): The name of the node to remove.
+        node_name_regex (Pattern): node_name compiled as regex when the config is loaded
     """
 
     node_name: str = Field(..., alias="node-name")
+    node_name_regex: Optional[Pattern] = Field(default=None, exclude=True)
+
+    @model_validator(mode="after")
+    def compile_node_name(self):
+        self.node_name_regex = compile_regex(self.node_name)
+        return self
 
 
 @dataclass
@@ -80,21 +100,94 @@ class TopologyAdjustmentRemoveLink(BaseModel):
     node_destination: str
 
 
+class InterfaceMode(str, Enum):
+    """
+    How an interface retrieves updates from the nodes
+
+    Attributes:
+        POLL (str): poll all paths on every sync interval
+        SUBSCRIBE (str): keep long-lived streaming subscriptions and report changes as they arrive
+    """
+
+    POLL = "poll"
+    SUBSCRIBE = "subscribe"
+
+
+class SubscriptionMode(str, Enum):
+    """
+    Mode of streaming subscriptions
+
+    Attributes:
+        ON_CHANGE (str): the node sends updates whenever a value changes
+        SAMPLE (str): the node sends updates every sample interval
+    """
+
+    ON_CHANGE = "on_change"
+    SAMPLE = "sample"
+
+
+class PathSettings(BaseModel):
+    """
+    Settings for a single gNMI path of an interface
+
+    Attributes:
+        path (str): gNMI path to watch
+        datatype (Optional[str]): what type of data to poll, defaults to the datatype of the interface
+        interval (Optional[float]): poll interval in seconds, the path is polled every sync interval if not set
+        max_interval (Optional[float]): interval in seconds the poll interval backs off to while the path is unchanged
+        priority (int): paths with a higher priority are polled first
+    """
+
+    path: str
+    datatype: Optional[str] = None
+    interval: Optional[float] = Field(default=None, gt=0)
+    max_interval: Optional[float] = Field(default=None, gt=0)
+    priority: int = 0
+
+
 class InterfaceSettings(BaseModel):
     """
     Interface settings that specify what data should be polled
 
     Attributes:
         nodes (str): Regex specifying what nodes to poll
+        nodes_regex (Pattern): nodes compiled as regex when the config is loaded
         datatype (str): what type of data to poll
-        paths (List[str]): gNMI paths to watch
-        strip (List[str]): a common prefix to strip from gnmi paths
+        paths (List[PathSettings]): gNMI paths to watch, plain path strings use the interface's defaults
+        strip (List[str]): gNMI path prefixes whose data is removed before it is stored, diffed and published
+        mode (InterfaceMode): whether to poll the paths or to subscribe to them
+        subscription_mode (SubscriptionMode): mode of the subscriptions if subscribe mode is used
+        sample_interval (float): sample interval in seconds for sample subscriptions
+        max_in_flight (int): maximum number of nodes polled concurrently
+        batch_get (bool): get all paths of a node with the same datatype using a single request
+        poll_jitter (float): fraction of a path's poll interval its polls are randomly shifted by
+        write_journal_ttl (float): seconds polled data matching an own write is not reported as a change
     """
 
     nodes: str
+    nodes_regex: Optional[Pattern] = Field(default=None, exclude=True)
     datatype: str
-    paths: List[str]
+    paths: List[PathSettings]
     strip: List[str]
+    mode: InterfaceMode = InterfaceMode.POLL
+    subscription_mode: SubscriptionMode = SubscriptionMode.ON_CHANGE
+    sample_interval: float = 10
+    max_in_flight: int = Field(default=1, ge=1)
+    batch_get: bool = False
+    poll_jitter: float = Field(default=0.1, ge=0, lt=1)
+    write_journal_ttl: float = Field(default=30, ge=0)
+
+    @field_validator("paths", mode="before")
+    @classmethod
+    def normalize_paths(cls, paths):
+        if isinstance(paths, list):
+            return [{"path": path} if isinstance(path, str) else path for path in paths]
+        return paths
+
+    @model_validator(mode="after")
+    def compile_nodes(self):
+        self.nodes_regex = compile_regex(self.nodes)
+        return self
 
 
 class RealnetSettings(BaseModel):
@@ -157,12 +250,16 @@ class ControllerSettings(BaseModel):
         builder (str): name of the builder for the controller to use
         interfaces (List[str]): interfaces available to the controller
         apps (List[str]): applications associated with this controller
+        workers (int): number of threads consuming the tasks of a sibling, sharing a consumer group. Only Kafka
+            partitions the channels by key and keeps the order of the tasks of a node, so more than one worker
+            requires Kafka.
     """
 
     module: str
     builder: str
     interfaces: List[str]
     apps: List[str]
+    workers: int = Field(1, ge=1)
 
 
 class BuilderSettings(BaseModel):
@@ -176,6 +273,25 @@ class BuilderSettings(BaseModel):
     module: str
 
 
+class ConnectionPoolSettings(BaseModel):
+    """
+    Settings for the pool of persistent interface sessions
+
+    Attributes:
+        connect_timeout (int): timeout for establishing a session in seconds
+        health_check_interval (float): idle time in seconds after which a session is checked before it is reused
+        idle_timeout (float): idle time in seconds after which a session is closed
+        backoff_initial (float): delay in seconds before the first reconnect attempt to a failed target
+        backoff_max (float): maximum delay in seconds between reconnect attempts
+    """
+
+    connect_timeout: int = 5
+    health_check_interval: float = 30
+    idle_timeout: float = 300
+    backoff_initial: float = 1
+    backoff_max: float = 60
+
+
 class InterfaceCredentials(BaseModel):
     """
     Credentials for a network interface
@@ -185,12 +301,17 @@ class InterfaceCredentials(BaseModel):
         port (int): network port number for the interface
         username (str): username for authentication
         password (str): password for authentication
+        connection_pool (ConnectionPoolSettings): settings for pooled sessions to the interface's targets
+        hosts (Dict[str, str]): addresses to connect to instead of resolving the hostnames of the nodes, e.g., of
+            simulated targets
     """
 
     module: str
     port: int
     username: str
     password: str
+    connection_pool: ConnectionPoolSettings = Field(default_factory=ConnectionPoolSettings)
+    hosts: Dict[str, str] = Field(default_factory=dict)
 
 
 class AppSettings(BaseModel):
@@ -219,6 +340,10 @@ class Settings(BaseModel):
         builders (Dict[str, BuilderSettings]): Settings for the builders, grouped by builder name.
         interface_credentials (Dict[str, InterfaceCredentials]): Credential data for interfaces, grouped by name.
         apps (Dict[str, AppSettings]): Configuration for applications, grouped by app name.
+        kafka (Optional[KafkaSettings]): Settings for Kafka as event broker.
+        rabbit (Optional[RabbitSettings]): Settings for RabbitMQ as event broker.
+        local (Optional[LocalSettings]): Settings for the local event broker, used if neither Kafka nor RabbitMQ
+            are configured.
     """
 
     topology_name: str = Field(..., alias="name")
@@ -235,6 +360,16 @@ class Settings(BaseModel):
     apps: Dict[str, AppSettings]
     kafka: Optional[KafkaSettings] = None
     rabbit: Optional[RabbitSettings] = None
+    local: Optional[LocalSettings] = None
+
+    @model_validator(mode="after")
+    def check_workers(self):
+        # the workers of other brokers compete for the messages of a queue, the tasks of a node would be reordered
+        if self.kafka is None:
+            for name, controller in self.controllers.items():
+                if controller.workers > 1:
+                    raise ValueError(f"controller {name} can only use {controller.workers} workers with Kafka")
+        return self
 
 
 def read_config(config_file: str) -> Settings:
@@ -248,11 +383,11 @@ def read_config(config_file: str) -> Settings:
         if validate_config(config):
             return config
         else:
-            raise Exception('configuration error: either kafka or rabbitmq settings must be provided')
+            raise Exception('configuration error: either kafka, rabbitmq or local settings must be provided')
 
 
 def validate_config(config: Settings) -> bool:
-    if config.kafka is None and config.rabbit is None:
+    if config.kafka is None and config.rabbit is None and config.local is None:
         return False
     else:
         return True
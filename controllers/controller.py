@@ -2,17 +2,16 @@
 
 from abc import ABC, abstractmethod
 
-import json
 from multiprocessing import Process
 
 import asyncio
 
 import importlib
 import copy
-import re
 import time
+import threading
 
-from event.eventbroker import EventBroker
+from event.eventbroker import EventBroker, DEFAULT_BATCH_SIZE
 from interfaces.gnmi import gnmi
 from config import Settings
 
@@ -130,6 +129,9 @@ class Controller(ABC):
         self.siblings = []  # siblings of the controller
         self.siblings.append(sibling)
         self.sibling_topo = {}  # topology state of the siblings
+        self.sync_interfaces = {}  # gNMI interfaces syncing realnet notifications to the siblings
+        # serializes the tasks of the worker threads with each other and with the polling and apps of the controller
+        self.state_lock = threading.RLock()
 
         # start the controller process
         self.process = Process(target=self.__run, name="Controller " + self.name())
@@ -226,7 +228,7 @@ class Controller(ABC):
                     for n in (
                         sibling_topology_definition["topology"]["nodes"].copy().items()
                     ):
-                        if re.fullmatch(adjustments.node_remove.node_name, n[0]):
+                        if adjustments.node_remove.node_name_regex.fullmatch(n[0]):
                             sibling_topology_definition["topology"]["nodes"].pop(n[0])
                             # Remove links to removed nodes from the topology
                             for link in sibling_topology_definition["topology"][
@@ -310,6 +312,8 @@ class Controller(ABC):
         If task is not None, the controller runs the apps on the task.
         Also, the task type is checked and if it is a gNMI notification and the source was the realnet, the controller sets
         the gNMI data on the nodes in the sibling's topology.
+        If the controller has more than one worker, the tasks are consumed by worker threads instead, while the
+        controller keeps polling the sibling's interfaces and running the apps on a regular interval.
 
         Args:
             None
@@ -321,24 +325,77 @@ class Controller(ABC):
             None
         """
 
-        while True:
-            self.__sleep_until_next_interval()
-            self.__process_sibling_tasks()
+        workers = self.config.controllers[self.name()].workers
+        try:
+            if workers > 1:
+                self.__start_task_workers(workers)
+            while True:
+                self.__sleep_until_next_interval()
+                self.__process_sibling_tasks(consume_tasks=workers == 1)
+        finally:
+            self.__close_interfaces()
+
+    def __close_interfaces(self):
+        for sibling in self.siblings:
+            if self.sibling_topo.get(sibling) is not None:
+                for interface in self.sibling_topo[sibling]["interfaces"].values():
+                    interface.close()
+        for interface in self.sync_interfaces.values():
+            interface.close()
 
     def __sleep_until_next_interval(self):
         self.logger.debug(
             f"sleeping until next interval to run apps in controller {self.name()}..."
         )
-        time.sleep(self.config.sync_interval)
-
-    def __process_sibling_tasks(self):
+        timeout = self.config.sync_interval
         for sibling in self.siblings:
             if self.sibling_topo.get(sibling) is not None:
-                if self.sibling_topo[sibling]["running"]:
-                    self.__get_interface_updates(sibling)
-            # run the apps for the sibling before processing the tasks to run it periodically
-            self.__run_apps_for_sibling(None, sibling)
-            self.__process_tasks_for_sibling(sibling)
+                for interface in self.sibling_topo[sibling]["interfaces"].values():
+                    delay = interface.get_next_poll_delay()
+                    if delay is not None:
+                        timeout = min(timeout, delay)
+        time.sleep(timeout)
+
+    def __process_sibling_tasks(self, consume_tasks: bool = True):
+        for sibling in self.siblings:
+            with self.state_lock:
+                if self.sibling_topo.get(sibling) is not None:
+                    if self.sibling_topo[sibling]["running"]:
+                        self.__get_interface_updates(sibling)
+                        self.broker.flush()
+                # run the apps for the sibling before processing the tasks to run it periodically
+                self.__run_apps_for_sibling(None, sibling)
+            if consume_tasks:
+                self.__process_tasks_for_sibling(sibling)
+
+    def __start_task_workers(self, workers: int):
+        # the workers of a sibling share a consumer group, every worker gets a share of the partitions of the
+        # sibling's channel, so the tasks of a node (keyed by node) are still processed in order by a single worker
+        for sibling in self.siblings:
+            for worker in range(workers):
+                thread = threading.Thread(
+                    target=self.__consume_tasks_for_sibling,
+                    args=(sibling, worker),
+                    name=f"Controller {self.name()} {sibling} worker {worker}",
+                    daemon=True,
+                )
+                thread.start()
+        self.logger.info(f"Controller {self.name()} started {workers} task workers per sibling")
+
+    def __consume_tasks_for_sibling(self, sibling, worker: int):
+        consumer, key = self.broker.subscribe(sibling, "controller_tasks")
+        try:
+            while True:
+                messages = self.broker.poll_batch(consumer, DEFAULT_BATCH_SIZE, 5)
+                if len(messages) > 0:
+                    self.logger.info(f"Worker {worker} got {len(messages)} task messages for {sibling}")
+                    self.__process_task_messages(messages, sibling)
+                    self.broker.commit(consumer)
+        except SystemExit:
+            self.logger.error(f"Worker {worker} for sibling {sibling} stopped")
+            raise
+        finally:
+            self.broker.close_consumer(key)
 
     def __get_interface_updates(self, sibling):
         sib_nodes = self.sibling_topo[sibling]["nodes"]
@@ -377,25 +434,30 @@ class Controller(ABC):
         while True:
             self.logger.debug(f"Checking task messages for {sibling}...")
             consumer = self.event_consumer[sibling]
-            message = self.broker.poll(consumer, 5)
-            if message is None:
+            messages = self.broker.poll_batch(consumer, DEFAULT_BATCH_SIZE, 5)
+            if len(messages) == 0:
                 self.logger.debug(f"No task messages for {sibling}...")
                 break
-            elif message.error():
+            self.logger.info(f"Got {len(messages)} task messages for {sibling}")
+            self.__process_task_messages(messages, sibling)
+            self.broker.commit(consumer)
+
+    def __process_task_messages(self, messages, sibling):
+        for message in messages:
+            if message.error():
                 self.logger.error(f"Consumer error: {message.error()}")
                 exit(1)
-            else:
-                task = json.loads(message.value())
-                self.logger.info(f"Task for {sibling}: {task}")
-                self.logger.debug(
-                    f"    *** Controller {self.name()} got task for sibling "
-                    f"{sibling}: {str(task)}"
-                )
+            task = message.value()
+            self.logger.debug(
+                f"    *** Controller {self.name()} got task for sibling "
+                f"{sibling}: {str(task)}"
+            )
+            with self.state_lock:
                 self.__set_gnmi_data_on_nodes(task, sibling)
                 self.__build_sibling_topology(task, sibling)
                 self.__run_apps_for_sibling(task, sibling)
 
-                self.logger.debug(f"Processed tasks for sibling {sibling}")
+        self.logger.debug(f"Processed {len(messages)} tasks for sibling {sibling}")
 
     def __set_gnmi_data_on_nodes(self, task, sibling):
         if task is not None:
@@ -405,30 +467,47 @@ class Controller(ABC):
                 and self.sibling_topo.get(sibling) is not None
                 and self.sibling_topo[sibling]["running"]
             ):
-                if task["diff"] != {}:
-                    notification_data = task["data"]
+                if task.get("patch"):
                     node = task["node"]
                     node_name = node
-                    path = task["path"]
-                    gnmi_instance = gnmi(
+                    gnmi_instance = self.__get_sync_interface(sibling)
+                    # only the changed leaves are written to the sibling
+                    gnmi_instance.setNodePatch(
+                        self.sibling_topo[sibling]["nodes"],
+                        node_name,
+                        task["patch"],
+                    )
+
+    def __get_sync_interface(self, sibling):
+        # reuse the sibling's gNMI interface, so its table of hostnames is only rebuilt when the topology changes
+        interface = self.sibling_topo[sibling]["interfaces"].get("gnmi")
+        if interface is None:
+            interface = self.sync_interfaces.get(sibling)
+            if interface is None:
+                interface = self.sync_interfaces.setdefault(
+                    sibling,
+                    gnmi(
                         self.config,
                         sibling,
                         self.logger,
                         self.topology_prefix,
                         self.topology_name,
-                    )
-                    gnmi_instance.setNodeUpdate(
-                        self.sibling_topo[sibling]["nodes"],
-                        node_name,
-                        path,
-                        notification_data,
-                    )
+                    ),
+                )
+        return interface
 
     def __build_sibling_topology(self, task, sibling):
         if task["type"] == "topology build request" and task["sibling"] == sibling:
+            previous = self.sibling_topo.get(sibling)
             self.sibling_topo[sibling] = self.__build_topology(
                 sibling, self.real_topo["topology"]
             )
+            if previous is not None:
+                # the interfaces of the replaced topology are not used anymore
+                for interface in previous["interfaces"].values():
+                    interface.close()
+            if self.sync_interfaces.get(sibling) is not None:
+                self.sync_interfaces[sibling].topology_changed(self.sibling_topo)
             for channel in self.broker.get_sibling_channels():
                 self.broker.publish(
                     channel,
@@ -438,9 +517,11 @@ class Controller(ABC):
                         "sibling": sibling,
                         "topology": self.sibling_topo[sibling]["topology"],
                         "nodes": self.sibling_topo[sibling]["nodes"],
-                        "interfaces": self.sibling_topo[sibling]["interfaces"],
+                        # interface instances can not be serialized, only report the names of the interfaces
+                        "interfaces": list(self.sibling_topo[sibling]["interfaces"]),
                         "running": self.sibling_topo[sibling]["running"],
                     },
+                    key=sibling,
                 )
 
     def __run_apps_for_sibling(self, task, sibling):
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import asyncio
-import json
 import os
 import signal
 import sys
 import importlib
 import logging
+from collections import deque
+from event.eventbroker import DEFAULT_BATCH_SIZE
 from event.kafka import KafkaClient
 from event.rabbit import RabbitClient
+from event.local import LocalClient
 
 import yaml
 
@@ -87,10 +89,14 @@ def main():
         nodes = create_nodes(clab_topology_definition)
         deploy_topology(reconfigure_containers, config)
 
-        broker = create_kafka_queues(config.siblings, config.kafka) if config.kafka is not None\
-            else create_rabbit_queues(config.siblings, config.rabbit)
+        if config.kafka is not None:
+            broker = create_kafka_queues(config.siblings, config.kafka, len(nodes))
+        elif config.rabbit is not None:
+            broker = create_rabbit_queues(config.siblings, config.rabbit)
+        else:
+            broker = create_local_queues(config.siblings, config.local)
 
-        siblings = create_siblings(
+        siblings, subscription, pending = create_siblings(
             config.siblings,
             controllers,
             config,
@@ -102,7 +108,7 @@ def main():
             topology_prefix,
         )
 
-        main_loop(config, realnet_interfaces, realnet_apps, siblings, nodes, broker)
+        main_loop(config, realnet_interfaces, realnet_apps, siblings, nodes, broker, subscription, pending)
 
 
 def load_controllers(config):
@@ -167,12 +173,21 @@ def create_rabbit_queues(siblings, stream_config):
     return client
 
 
-def create_kafka_queues(siblings, stream_config):
+def create_local_queues(siblings, stream_config):
+    queue_names = []
+    for sibling in siblings:
+        queue_names.append(sibling)
+    queue_names.append("realnet")
+    client = LocalClient(stream_config, queue_names, logger)
+    return client
+
+
+def create_kafka_queues(siblings, stream_config, node_count=None):
     queue_names = []
     for sibling in siblings:
         queue_names.append(sibling)
     queue_names.append("realnet")
-    client = KafkaClient(stream_config, queue_names, logger)
+    client = KafkaClient(stream_config, queue_names, logger, node_count)
     return client
 
 
@@ -188,7 +203,14 @@ def create_siblings(
     topology_prefix,
 ):
     siblings = dict()
-    consumer, key = kafka_client.subscribe("realnet", "create_siblings")
+    # the main loop continues with this consumer and handles the messages not handled here, they are committed once
+    # the main loop handled them. RabbitMQ acknowledges the polled messages when the next ones are polled though, so
+    # only Kafka delivers them again if DigSiNet stops before.
+    consumer, key = kafka_client.subscribe("realnet", "realnet_tasks")
+    # messages polled but not yet processed, e.g., received after the build response of the previous sibling
+    pending = deque()
+    # messages processed, but not handled while waiting for a build response, e.g., tasks of the siblings' apps
+    unhandled = []
     for sibling in siblings_config:
         siblings[sibling] = dict()
         if siblings_config[sibling].controller:
@@ -218,26 +240,31 @@ def create_siblings(
                     "source": "realnet",
                     "sibling": sibling,
                 },
+                key=sibling,
             )
+            kafka_client.flush()
             timeout = config.sibling_timeout
             try:
                 logger.info(f"Waiting for topology build response for realnet...")
                 while True:
-                    message = kafka_client.poll(consumer, timeout=timeout)
-                    if message is None:
+                    if len(pending) == 0:
+                        pending.extend(
+                            kafka_client.poll_batch(consumer, DEFAULT_BATCH_SIZE, timeout)
+                        )
+                    if len(pending) == 0:
                         logger.error(
                             f"Timeout while waiting for topology build response from sibling {sibling}"
                         )
 
                         kafka_client.close()
                         exit(1)
-                    elif message.error():
+                    message = pending.popleft()
+                    if message.error():
                         logger.error(f"Consumer error: {message.error()}")
                         kafka_client.close()
                         exit(1)
                     else:
-                        task = json.loads(message.value())
-
+                        task = message.value()
                         if (
                             task["type"] == "topology build response"
                             and task["sibling"] == sibling
@@ -251,20 +278,35 @@ def create_siblings(
                                 }
                             )
                             break
+                        unhandled.append(message)
             finally:
                 logger.debug(f"Topology build response for sibling {sibling} received.")
 
-    logger.debug(f"Closing consumer...")
-    kafka_client.close_consumer(key)
-    return siblings
+    pending.extendleft(reversed(unhandled))
+    return siblings, (consumer, key), pending
+
+
+def next_poll_timeout(config, interfaces) -> float:
+    """
+    Get the time to wait for tasks before the interfaces are polled again, which is the sync interval unless an
+    interface has paths with a shorter poll interval.
+    """
+    timeout = config.sync_interval
+    for interface in interfaces.values():
+        delay = interface.get_next_poll_delay()
+        if delay is not None:
+            timeout = min(timeout, delay)
+    return timeout
 
 
 def main_loop(
-    config, realnet_interfaces, realnet_apps, siblings, nodes, kafka_client: KafkaClient
+    config, realnet_interfaces, realnet_apps, siblings, nodes, kafka_client: KafkaClient, subscription, pending
 ):
     logger.info("=== Entering main Loop...")
     # stats_interval = 10
-    consumer, key = kafka_client.subscribe("realnet", "main_loop")
+    consumer, key = subscription
+    for interface in realnet_interfaces:
+        realnet_interfaces[interface].topology_changed(siblings)
     try:
         while True:
             # Stats removed for now - will be used in dashboard
@@ -286,20 +328,30 @@ def main_loop(
                 nodes = interface_instance.getNodesUpdate(
                     nodes, siblings, kafka_client, diff=True
                 )
-            task = None
-            logger.info(f"Checking for consumer message in main loop for realnet...")
-            message = kafka_client.poll(consumer, config.sync_interval)
-            if message is None:
+            # the updates of all nodes are published asynchronously, wait for their delivery once per pass
+            kafka_client.flush()
+            logger.info(f"Checking for consumer messages in main loop for realnet...")
+            if len(pending) > 0:
+                # handle the messages received while the siblings were created first
+                messages = list(pending)
+                pending.clear()
+            else:
+                messages = kafka_client.poll_batch(
+                    consumer, DEFAULT_BATCH_SIZE, next_poll_timeout(config, realnet_interfaces)
+                )
+            if len(messages) == 0:
                 logger.error(f"Timeout while waiting for task for realnet")
                 # kafka_client.close()
                 # exit(1)
-            elif message.error():
-                logger.error(f"Consumer error: {message.error()}")
-                kafka_client.close()
-                exit(1)
             else:
-                task = json.loads(message.value())
-                logger.info(f"Got task {task}...")
+                logger.info(f"Got {len(messages)} messages for realnet...")
+            # process the backlog of tasks in chunks instead of one task per loop pass
+            for message in messages:
+                if message.error():
+                    logger.error(f"Consumer error: {message.error()}")
+                    kafka_client.close()
+                    exit(1)
+                task = message.value()
                 logger.debug(f"*** Realnet got task: {str(task)}")
                 if task["type"] == "topology build response":
                     sibling = task["sibling"]
@@ -311,6 +363,8 @@ def main_loop(
                             "running": task["running"],
                         }
                     )
+                    for interface in realnet_interfaces:
+                        realnet_interfaces[interface].topology_changed(siblings)
                 for app in realnet_apps:
                     logger.debug(f"=== Running App {app[0]} on realnet...")
                     asyncio.run(
@@ -319,7 +373,11 @@ def main_loop(
                         )
                     )
                 # queues["realnet"].task_done()
+            if len(messages) > 0:
+                kafka_client.commit(consumer)
     finally:
+        for interface in realnet_interfaces:
+            realnet_interfaces[interface].close()
         kafka_client.close_consumer(key)
 
 
@@ -3,19 +3,55 @@ from typing import List
 from logging import Logger
 from message.message import Message
 
+# maximum number of messages the consumer loops process per poll
+DEFAULT_BATCH_SIZE = 100
+
 
 class EventBroker(ABC):
     def __init__(self, config, channels: List[str], logger: Logger):
         pass
 
     @abstractmethod
-    def publish(self, channel: str, data):
+    def publish(self, channel: str, data, key: str = None):
+        """
+        Publish a message to a channel.
+
+        :param key: Key of the message, e.g., the node it is about. Messages with the same key are delivered in
+            order, brokers partitioning channels use it to choose the partition.
+        """
+        pass
+
+    @abstractmethod
+    def flush(self):
+        """
+        Wait until all published messages are delivered.
+        """
         pass
 
     @abstractmethod
     def poll(self, consumer, timeout) -> Message:
         pass
 
+    @abstractmethod
+    def poll_batch(self, consumer, max_messages: int, timeout) -> List[Message]:
+        """
+        Get up to max_messages messages, waiting up to timeout seconds for the first one.
+
+        :return: The messages, empty if the timeout expired.
+        """
+        pass
+
+    @abstractmethod
+    def commit(self, consumer, message: Message = None):
+        """
+        Mark messages of a consumer as processed, so they are not delivered again to its group, e.g., after
+        resubscribing or restarting.
+
+        :param message: The last processed message, None if all polled messages were processed. Brokers without
+            offsets acknowledge all polled messages.
+        """
+        pass
+
     @abstractmethod
     def subscribe(self, channel: str, group_id: str = None):
         pass
@@ -1,59 +1,202 @@
+import os
+import math
 import time
+import threading
 from typing import List
-from config.kafka import KafkaSettings
+from config.kafka import KafkaSettings, TopicsConfig
 from event.eventbroker import EventBroker
 from logging import Logger
-from confluent_kafka import Consumer, Producer
-from confluent_kafka.admin import AdminClient, NewTopic
+from confluent_kafka import Consumer, Producer, TopicPartition, KafkaException, KafkaError
+from confluent_kafka.admin import AdminClient, NewTopic, NewPartitions
 from message.kafka import KafkaMessage
+from message.codec import Codec
 from message.message import Message
 import uuid
-import json
+
+
+def partitions_for_nodes(config: TopicsConfig, node_count: int = None) -> int:
+    """
+    Choose the number of partitions of the topics based on the number of nodes in the topology.
+
+    :param config: The topics configuration.
+    :param node_count: The number of nodes, None if unknown.
+    :return: The configured number of partitions or, if nodes_per_partition is set, enough partitions for the nodes,
+        capped at max_partitions.
+    """
+    if config.nodes_per_partition is None or node_count is None:
+        return config.num_partitions
+    partitions = math.ceil(node_count / config.nodes_per_partition)
+    return max(config.num_partitions, min(partitions, config.max_partitions))
 
 
 class KafkaClient(EventBroker):
-    def __init__(self, config: KafkaSettings, channels: List[str], logger: Logger):
+    def __init__(self, config: KafkaSettings, channels: List[str], logger: Logger, node_count: int = None):
         super().__init__(config, channels, logger)
         self.config = config
         self.logger = logger
+        self.num_partitions = partitions_for_nodes(config.topics, node_count)
+        # consumers subscribing with the same group id in this run share the group, e.g., the workers of a sibling
+        self.group_suffix = uuid.uuid4().hex
+        self.codec = Codec(config.codec)
         self.consumers = dict()
-        self.producers = dict()
-        self.admin = AdminClient(self.__createAdminConfig(config.host, config.port))
-        self.kafka_topics = set(self.admin.list_topics().topics.keys())
+        # offsets of the processed messages of every consumer, by (topic, partition)
+        self.offsets = dict()
+        # topics created in this run and stable consumer groups whose offsets were reset for them
+        self.created_topics = set()
+        self.reset_groups = set()
+        self.groups_lock = threading.Lock()
+        self.producer = None
+        self.producer_pid = None
+        self.poll_thread = None
+        self.metrics = dict()
+        self.metrics_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.admin = None
+        self.admin_pid = None
+        metadata = self.__get_admin().list_topics()
+        self.kafka_topics = set(metadata.topics.keys())
         self.topics = channels
         for topic in self.topics:
-            self.new_sibling_channel(topic)
-
-    def publish(self, channel: str, data):
-        if channel not in self.producers:
-            self.logger.error(f"Producer for topic {channel} not found")
-            self.__createProducer(channel)
-        self.logger.info(
-            f"Producing message to topic {channel}: {json.dumps(data, default= lambda obj: '<not serializable>')}"
-        )
-        self.producers[channel].produce(
-            channel, json.dumps(data, default=lambda obj: "<not serializable>")
-        )
-        self.producers[channel].poll(1)
+            if topic in self.kafka_topics:
+                self.__grow_partitions(topic, len(metadata.topics[topic].partitions))
+            else:
+                self.new_sibling_channel(topic)
+
+    def publish(self, channel: str, data, key: str = None):
+        producer = self.__get_producer()
+        payload = self.codec.encode(data)
+        self.logger.info(f"Producing message of {len(payload)} bytes to topic {channel}")
+        try:
+            try:
+                producer.produce(channel, payload, key=key, on_delivery=self.__on_delivery)
+            except BufferError:
+                # the memory budget of the producer is exhausted, wait for deliveries to free it up
+                self.logger.warning(f"Producer queue full, waiting for deliveries to produce to topic {channel}...")
+                producer.poll(self.config.producer.flush_timeout)
+                producer.produce(channel, payload, key=key, on_delivery=self.__on_delivery)
+        except BufferError:
+            self.__count(channel, "dropped")
+            self.logger.error(f"Producer queue still full, dropped message to topic {channel}")
+            return
+        self.__count(channel, "produced", len(payload))
+
+    def flush(self):
+        if self.producer is not None and self.producer_pid == os.getpid():
+            remaining = self.producer.flush(self.config.producer.flush_timeout)
+            if remaining > 0:
+                self.logger.warning(f"{remaining} messages not delivered after flush timeout")
+            self.logger.debug(f"Producer metrics by topic: {self.get_metrics()}")
+
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the messages published by this process.
+
+        :return: A dict of the produced, delivered, failed and dropped messages and the produced bytes by topic.
+        """
+        with self.metrics_lock:
+            return {topic: dict(metrics) for topic, metrics in self.metrics.items()}
+
+    def __count(self, topic: str, metric: str, size: int = 0):
+        with self.metrics_lock:
+            metrics = self.metrics.get(topic)
+            if metrics is None:
+                metrics = self.metrics[topic] = {"produced": 0, "delivered": 0, "failed": 0, "dropped": 0, "bytes": 0}
+            metrics[metric] += 1
+            metrics["bytes"] += size
+
+    def __on_delivery(self, error, message):
+        if error is not None:
+            self.__count(message.topic(), "failed")
+            self.logger.error(f"Failed to deliver message to topic {message.topic()}: {error}")
+        else:
+            self.__count(message.topic(), "delivered")
+            self.logger.debug(f"Delivered message to topic {message.topic()} [{message.partition()}]")
+
+    def __get_producer(self) -> Producer:
+        # librdkafka handles and threads do not survive forking, every publishing process gets its own producer,
+        # shared by all topics and threads of the process
+        if self.producer_pid != os.getpid():
+            self.producer_pid = os.getpid()
+            self.metrics = dict()
+            self.metrics_lock = threading.Lock()
+            self.producer = self.__createProducer(f"digsinet-{self.producer_pid}")
+            self.poll_thread = threading.Thread(target=self.__poll_producer, name="Kafka producer poll", daemon=True)
+            self.poll_thread.start()
+        return self.producer
+
+    def __get_admin(self) -> AdminClient:
+        # like the producer, the admin client does not survive forking, e.g., into the controller processes
+        if self.admin_pid != os.getpid():
+            self.admin_pid = os.getpid()
+            self.admin = AdminClient(self.__createAdminConfig(self.config.host, self.config.port))
+        return self.admin
+
+    def __poll_producer(self):
+        # serve delivery callbacks in the background, so publish never blocks on the broker
+        producer = self.producer
+        while not self.closed.is_set() and self.producer is producer:
+            producer.poll(self.config.producer.poll_interval)
 
     def poll(self, consumer, timeout) -> Message:
         message = consumer.poll(timeout)
         if message is None:
             return None
-        return KafkaMessage(message)
+        return KafkaMessage(message, self.codec)
+
+    def poll_batch(self, consumer, max_messages: int, timeout) -> List[Message]:
+        messages = consumer.consume(num_messages=max_messages, timeout=-1 if timeout is None else timeout)
+        return [KafkaMessage(message, self.codec) for message in messages]
+
+    def commit(self, consumer, message: KafkaMessage = None):
+        if message is not None:
+            raw = message.kafka_message
+            offsets = [TopicPartition(raw.topic(), raw.partition(), raw.offset() + 1)]
+        else:
+            # the positions of the consumer are the offsets following the polled messages
+            offsets = [tp for tp in consumer.position(consumer.assignment()) if tp.offset >= 0]
+        processed = self.offsets.setdefault(consumer, dict())
+        for tp in offsets:
+            processed[(tp.topic, tp.partition)] = tp.offset
+        if len(offsets) > 0:
+            try:
+                consumer.commit(offsets=offsets, asynchronous=True)
+            except KafkaException as e:
+                self.logger.error(f"Failed to commit offsets: {e}")
 
     def subscribe(self, channel: str, group_id: str = None):
-        # TODO Alternative for single consumer groups (instead of using uuid)
-        # Forcing unique group_id for each consumer
-        group_id = group_id + "_" + uuid.uuid4().hex
-        key = channel + "_" + group_id
-        if key not in self.consumers:
-            self.__createConsumer(group_id, channel)
-        return self.consumers[channel + "_" + group_id], key
+        # every subscription gets its own consumer in the group, so the partitions of the topic are spread over the
+        # consumers subscribing with the same group_id, e.g., the workers of a sibling
+        if self.config.consumer.stable_groups:
+            # consumers resume from the offsets committed by the group, e.g., in a previous run
+            group_id = f"{self.config.consumer.group_prefix}.{channel}.{group_id}"
+            if channel in self.created_topics:
+                self.__reset_group(group_id)
+        else:
+            group_id = group_id + "_" + self.group_suffix
+        key = channel + "_" + group_id + "_" + uuid.uuid4().hex
+        consumer = self.__createConsumer(group_id, channel)
+        self.consumers[key] = consumer
+        return consumer, key
 
     def get_sibling_channels(self):
         return self.topics
 
+    def __reset_group(self, group_id: str):
+        # offsets committed for a previous incarnation of a recreated topic would skip its first messages, drop them
+        # once per run before the group is used
+        with self.groups_lock:
+            if group_id in self.reset_groups:
+                return
+            self.reset_groups.add(group_id)
+            res = self.__get_admin().delete_consumer_groups([group_id], request_timeout=10)
+            for group, f in res.items():
+                try:
+                    f.result()
+                    self.logger.info(f"Offsets of consumer group {group} reset")
+                except Exception as e:
+                    # the group does not exist yet or is already used by another process of this run
+                    self.logger.debug(f"Consumer group {group} not reset: {e}")
+
     def __clear_all_channels(self):
         for topic in self.kafka_topics.copy():
             if topic == "__consumer_offsets":
@@ -65,7 +208,7 @@ class KafkaClient(EventBroker):
 
     def __delete_sibling_channel(self, channel: str):
         if channel in self.kafka_topics:
-            res = self.admin.delete_topics([channel], operation_timeout=10)
+            res = self.__get_admin().delete_topics([channel], operation_timeout=10)
             for topic, f in res.items():
                 try:
                     f.result()
@@ -78,7 +221,7 @@ class KafkaClient(EventBroker):
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
-                metadata = self.admin.list_topics(timeout=5)
+                metadata = self.__get_admin().list_topics(timeout=5)
                 if topic not in metadata.topics.keys():
                     self.logger.info(f"Topic {topic} successfully deleted")
                     return
@@ -92,36 +235,65 @@ class KafkaClient(EventBroker):
         if channel not in self.kafka_topics:
             new_topic = NewTopic(
                 channel,
-                num_partitions=self.config.topics.num_partitions,
+                num_partitions=self.num_partitions,
                 replication_factor=self.config.topics.replication_factor,
             )
-            res = self.admin.create_topics(
+            res = self.__get_admin().create_topics(
                 new_topics=[new_topic], validate_only=False, operation_timeout=10
             )
             for topic, f in res.items():
                 try:
                     f.result()
                     self.kafka_topics.add(topic)
+                    self.created_topics.add(topic)
                     self.logger.info(f"Topic {topic} created")
                 except Exception as e:
                     self.logger.error(f"Failed to create topic {topic}: {e}")
 
+    def __grow_partitions(self, topic: str, partitions: int):
+        # partitions can only be added, topics with more partitions than needed are kept as they are
+        if partitions < self.num_partitions:
+            res = self.__get_admin().create_partitions(
+                [NewPartitions(topic, self.num_partitions)], operation_timeout=10
+            )
+            for topic, f in res.items():
+                try:
+                    f.result()
+                    self.logger.info(f"Topic {topic} grown to {self.num_partitions} partitions")
+                except Exception as e:
+                    self.logger.error(f"Failed to add partitions to topic {topic}: {e}")
+
     def close(self):
+        self.closed.set()
         self.__close_all_consumers()
         self.__close_all_producers()
-        self.__clear_all_channels()
+        if self.config.topics.delete_on_close:
+            self.__clear_all_channels()
 
     def close_consumer(self, key: str):
         if key in self.consumers:
+            self.__commit_processed(self.consumers[key])
             self.consumers[key].unsubscribe()
             self.consumers[key].unassign()
             self.consumers[key].close()
             self.logger.info(f"Consumer for key {key} closed")
             del self.consumers[key]
 
+    def __commit_processed(self, consumer: Consumer):
+        # wait for the offsets of the processed messages to be committed, asynchronous commits may still be in flight
+        processed = self.offsets.pop(consumer, None)
+        if processed:
+            try:
+                offsets = [TopicPartition(topic, partition, offset) for (topic, partition), offset in processed.items()]
+                consumer.commit(offsets=offsets, asynchronous=False)
+            except KafkaException as e:
+                if e.args[0].code() != KafkaError._NO_OFFSET:
+                    self.logger.error(f"Failed to commit offsets: {e}")
+
     def __close_all_consumers(self):
         for consumer in self.consumers.values():
             try:
+                self.__commit_processed(consumer)
                 consumer.close()
             except Exception as e:
                 self.logger.error(f"Error while closing consumer: {e}")
@@ -130,14 +302,15 @@ class KafkaClient(EventBroker):
         self.logger.info("All consumers closed")
 
     def __close_all_producers(self):
-        for producer in self.producers.values():
+        if self.producer is not None and self.producer_pid == os.getpid():
             try:
-                producer.purge()
-                producer.flush()
+                self.producer.purge()
+                self.producer.flush()
             except Exception as e:
                 self.logger.error(f"Error while closing producer: {e}")
-            self.logger.info(f"Producer {producer} flushed")
-        self.producers.clear()
+            self.logger.info(f"Producer {self.producer} flushed")
+        self.producer = None
+        self.producer_pid = None
         self.logger.info("All producers closed")
 
     def __createAdminConfig(self, host: str, port: int):
@@ -153,6 +326,8 @@ class KafkaClient(EventBroker):
             "bootstrap.servers": f"{self.config.host}:{self.config.port}",
             "group.id": group_id,
             "auto.offset.reset": self.config.offset.reset_type.value,
+            # offsets are committed explicitly once the messages were processed
+            "enable.auto.commit": False,
         }
 
         return conf
@@ -161,21 +336,22 @@ class KafkaClient(EventBroker):
         conf = {
             "bootstrap.servers": f"{self.config.host}:{self.config.port}",
             "client.id": client_id,
+            "linger.ms": self.config.producer.linger_ms,
+            "batch.size": self.config.producer.batch_size,
+            "compression.type": self.config.producer.compression_type.value,
+            "queue.buffering.max.messages": self.config.producer.queue_max_messages,
+            "queue.buffering.max.kbytes": self.config.producer.queue_max_kbytes,
         }
 
         return conf
 
-    def __createConsumer(self, group_id: str, topic: str):
-        if topic not in self.consumers:
-            consumer = Consumer(self.__createConsumerConfig(group_id))
-            consumer.subscribe([topic])
-            self.consumers[topic + "_" + group_id] = consumer
-            self.logger.info(f"Consumer in Group {group_id} created for topic {topic}")
-
-        return self.consumers[topic + "_" + group_id]
+    def __createConsumer(self, group_id: str, topic: str) -> Consumer:
+        consumer = Consumer(self.__createConsumerConfig(group_id))
+        consumer.subscribe([topic])
+        self.logger.info(f"Consumer in Group {group_id} created for topic {topic}")
+        return consumer
 
-    def __createProducer(self, client_id: str):
-        if client_id not in self.producers:
-            producer = Producer(self.__createProducerConfig(client_id))
-            self.producers[client_id] = producer
-            self.logger.info(f"Producer {client_id} created")
+    def __createProducer(self, client_id: str) -> Producer:
+        producer = Producer(self.__createProducerConfig(client_id))
+        self.logger.info(f"Producer {client_id} created")
+        return producer
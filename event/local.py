@@ -0,0 +1,100 @@
+import queue
+import uuid
+from multiprocessing import Queue
+from typing import List
+from logging import Logger
+
+from config.local import LocalSettings
+from event.eventbroker import EventBroker
+from message.codec import Codec
+from message.local import LocalMessage
+
+
+class LocalClient(EventBroker):
+    """
+    Broker passing messages between the processes of a single host, e.g., for small deployments and CI.
+
+    Every channel is a multiprocessing queue, i.e., a pipe between the processes, so no broker server is needed.
+    Like a RabbitMQ queue, a channel delivers its messages in order and consumers of the same channel compete for
+    them. The queues are inherited by the controller processes, so all channels must exist before the controllers
+    are started.
+    """
+
+    def __init__(self, config: LocalSettings, channels: List[str], logger: Logger):
+        super().__init__(config, channels, logger)
+        self.config = config
+        self.logger = logger
+        self.codec = Codec(config.codec)
+        self.channels = channels
+        self.queues = dict()
+        self.consumers = dict()
+        for channel in self.channels:
+            self.new_sibling_channel(channel)
+
+    def publish(self, channel: str, data, key: str = None):
+        # every channel is a single queue delivering its messages in order, the key is not needed
+        if channel not in self.queues:
+            self.logger.error(f"Dropped message to unknown channel {channel}")
+            return
+        payload = self.codec.encode(data)
+        self.logger.info(f"Publishing message of {len(payload)} bytes to channel {channel}")
+        try:
+            self.queues[channel].put(payload, timeout=self.config.publish_timeout)
+        except queue.Full:
+            self.logger.error(f"Channel {channel} still full, dropped message")
+
+    def flush(self):
+        # published messages are written to the pipes by the feeder threads of the queues, there are no deliveries
+        # to wait for
+        pass
+
+    def poll(self, consumer, timeout) -> LocalMessage:
+        messages = self.poll_batch(consumer, 1, timeout)
+        if len(messages) == 0:
+            return None
+        return messages[0]
+
+    def poll_batch(self, consumer, max_messages: int, timeout) -> List[LocalMessage]:
+        if consumer not in self.consumers:
+            self.logger.warning("poll attempted for non existing consumer")
+            return []
+        channel_queue = self.consumers[consumer]
+        messages = []
+        try:
+            messages.append(channel_queue.get(timeout=timeout))
+            while len(messages) < max_messages:
+                messages.append(channel_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return [LocalMessage(message, self.codec) for message in messages]
+
+    def commit(self, consumer, message: LocalMessage = None):
+        # messages are removed from the queue when they are polled
+        pass
+
+    def subscribe(self, channel: str, group_id: str = None):
+        self.logger.info(f"Subscribing to channel {channel}")
+        key = channel + "_" + (group_id or "") + "_" + uuid.uuid4().hex
+        self.consumers[key] = self.queues[channel]
+        return key, key
+
+    def get_sibling_channels(self):
+        return self.channels
+
+    def new_sibling_channel(self, channel: str):
+        if channel not in self.queues:
+            self.queues[channel] = Queue(self.config.max_queue_size)
+            self.logger.info(f"Channel {channel} created")
+
+    def close(self):
+        self.consumers.clear()
+        for channel_queue in self.queues.values():
+            channel_queue.close()
+            # don't block the shutdown on messages no process will read anymore
+            channel_queue.cancel_join_thread()
+        self.logger.info("All channels closed")
+
+    def close_consumer(self, consumer: str):
+        if consumer in self.consumers:
+            del self.consumers[consumer]
+            self.logger.info(f"Consumer {consumer} closed")
@@ -1,86 +1,270 @@
-import json
+import os
 import socket
 import time
+import threading
+import uuid
+from collections import deque
 
 from event.eventbroker import EventBroker
 from logging import Logger
 from config import RabbitSettings
 from message.rabbit import RabbitMessage
+from message.codec import Codec
 from typing import List, Dict
 from kombu import Connection, Queue, Exchange, Consumer, Message, Producer
 
 
 class RabbitConsumer:
-    def __init__(self, logger: Logger, conn: Connection, queue: Queue, exchange: Exchange):
+    """
+    Consumer of a queue with at most prefetch_count unacknowledged messages.
+
+    Received messages are buffered in a deque and acknowledged after they were processed, i.e., when the next
+    messages are polled or the consumer is closed. All processed messages are acknowledged at once using a multi-ack.
+    Messages that were received but not processed are redelivered by RabbitMQ if the consumer dies.
+    """
+
+    def __init__(
+        self, logger: Logger, conn: Connection, queue: Queue, exchange: Exchange, prefetch_count: int, codec: Codec
+    ):
         self.logger = logger
+        self.codec = codec
         self.conn = conn
         self.queue = queue
         self.exchange = exchange
+        self.messages = deque()
+        self.delivered = None
         self.consumer = Consumer(conn, [queue], on_message=self.__on_message)
+        self.consumer.qos(prefetch_count=prefetch_count)
         self.consumer.consume()
-        self.messages = []
 
     def __on_message(self, message: Message):
         self.logger.info(f'received message from rabbit: {message}')
         self.messages.append(message)
-        message.ack()
 
     def has_messages(self):
         return len(self.messages) > 0
 
     def poll(self, timeout) -> RabbitMessage:
+        messages = self.poll_batch(1, timeout)
+        if len(messages) == 0:
+            return None
+        return messages[0]
+
+    def poll_batch(self, max_messages: int, timeout) -> List[RabbitMessage]:
+        """
+        Get up to max_messages buffered messages, waiting up to timeout seconds for the first one. The messages
+        returned by the previous call are acknowledged as processed.
+
+        :param max_messages: The maximum number of messages to return.
+        :param timeout: The maximum time to wait for a message in seconds, None to wait forever.
+        :return: The messages, empty if the timeout expired.
+        """
+        self.ack()
         self.logger.info(f'Polling {self.queue.name}...')
         time_start = time.monotonic()
         remaining = timeout
-        while True:
-            if len(self.messages) > 0:
-                return RabbitMessage(self.messages.pop(0).body)
-
+        while len(self.messages) == 0:
             if remaining is not None and remaining <= 0.0:
-                return None
+                return []
             try:
                 self.conn.drain_events(timeout=remaining)
             except socket.timeout:
                 self.logger.warning('exceeded timeout while waiting for message')
-                return None
+                return []
             # TODO: This is very strange, definitely needs to be addressed later down the line
             except OSError:
-                return None
+                return []
 
             if remaining is not None:
                 elapsed = time.monotonic() - time_start
                 remaining = timeout - elapsed
 
+        batch = []
+        while len(self.messages) > 0 and len(batch) < max_messages:
+            self.delivered = self.messages.popleft()
+            batch.append(RabbitMessage(self.delivered.body, self.codec))
+        return batch
+
+    def ack(self):
+        """
+        Acknowledge all messages returned so far.
+        """
+        if self.delivered is not None:
+            # messages are returned in delivery order, acking the last one acks all of them
+            self.delivered.ack(multiple=True)
+            self.delivered = None
+
     def close(self):
+        try:
+            self.ack()
+        except Exception as e:
+            self.logger.error(f'Error while acknowledging processed messages: {e}')
         self.consumer.close()
         self.conn.release()
 
 
+class RabbitPublisher:
+    """
+    Publisher keeping a connection and a channel to RabbitMQ open for all messages published by a process.
+
+    Queues are declared once per connection. Publisher confirms are enabled on the channel, but instead of waiting
+    for the confirm of every message, they are awaited once confirm_batch_size messages are outstanding or when the
+    publisher is flushed. If the connection is lost, it is reestablished and unconfirmed messages are published again.
+    The publisher can be used by several threads of a process.
+    """
+
+    def __init__(self, client: "RabbitClient"):
+        self.client = client
+        self.config = client.config
+        self.logger = client.logger
+        self.conn = None
+        self.channel = None
+        self.producer = None
+        self.declared = set()
+        self.unconfirmed = dict()
+        self.nacked = []
+        self.next_tag = 1
+        self.lock = threading.RLock()
+
+    def publish(self, routing_key: str, body: bytes):
+        with self.lock:
+            self.__publish_reconnecting(routing_key, body)
+            if len(self.unconfirmed) >= self.config.confirm_batch_size:
+                self.wait_for_confirms()
+
+    def wait_for_confirms(self):
+        """
+        Wait until all published messages are confirmed by RabbitMQ, publishing rejected messages again.
+        """
+        with self.lock:
+            deadline = time.monotonic() + self.config.confirm_timeout
+            while len(self.unconfirmed) > 0 or len(self.nacked) > 0:
+                nacked, self.nacked = self.nacked, []
+                for routing_key, body in nacked:
+                    self.__publish_reconnecting(routing_key, body)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.logger.warning(f"{len(self.unconfirmed)} published messages not confirmed by RabbitMQ in time")
+                    return
+                try:
+                    self.conn.drain_events(timeout=remaining)
+                except socket.timeout:
+                    continue
+                except self.conn.recoverable_connection_errors as e:
+                    self.__reconnect(e)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                try:
+                    self.wait_for_confirms()
+                    self.conn.release()
+                except Exception as e:
+                    self.logger.error(f"Error while closing RabbitMQ publisher: {e}")
+            self.conn = None
+
+    def __publish_reconnecting(self, routing_key: str, body: bytes):
+        if self.conn is None:
+            self.__connect()
+        try:
+            self.__publish(routing_key, body)
+        except (self.conn.recoverable_connection_errors + self.conn.recoverable_channel_errors) as e:
+            self.__reconnect(e)
+            self.__publish(routing_key, body)
+
+    def __publish(self, routing_key: str, body: bytes):
+        if routing_key not in self.declared:
+            self.__declare(Queue(routing_key, exchange=self.client.exchange, routing_key=routing_key))
+        self.producer.publish(
+            body,
+            exchange=self.client.exchange,
+            routing_key=routing_key,
+            content_type="application/octet-stream",
+            content_encoding="binary",
+        )
+        self.unconfirmed[self.next_tag] = (routing_key, body)
+        self.next_tag += 1
+
+    def __connect(self):
+        self.conn = self.client.make_connection()
+        self.conn.ensure_connection(max_retries=self.config.reconnect_max_retries)
+        self.channel = self.conn.channel()
+        self.channel.confirm_select()
+        self.channel.events["basic_ack"].add(self.__on_ack)
+        self.channel.events["basic_nack"].add(self.__on_nack)
+        self.producer = Producer(self.channel, exchange=self.client.exchange)
+        self.declared = set()
+        self.next_tag = 1
+        for queue in self.client.queues:
+            self.__declare(queue)
+        self.logger.info(f"Publisher connected to RabbitMQ (process {os.getpid()})")
+
+    def __reconnect(self, error: Exception):
+        self.logger.warning(f"Lost publisher connection to RabbitMQ, reconnecting: {error}")
+        pending = list(self.unconfirmed.values()) + self.nacked
+        self.unconfirmed = dict()
+        self.nacked = []
+        try:
+            self.conn.release()
+        except Exception:
+            pass
+        self.__connect()
+        # unconfirmed messages may have been lost with the connection, publish them again
+        for routing_key, body in pending:
+            self.__publish(routing_key, body)
+
+    def __declare(self, queue: Queue):
+        queue(self.channel).declare()
+        self.declared.add(queue.routing_key)
+
+    def __on_ack(self, delivery_tag: int, multiple: bool):
+        self.__confirmed(delivery_tag, multiple)
+
+    def __on_nack(self, delivery_tag: int, multiple: bool):
+        for routing_key, body in self.__confirmed(delivery_tag, multiple):
+            self.logger.error(f"RabbitMQ rejected message to channel {routing_key}, publishing it again")
+            self.nacked.append((routing_key, body))
+
+    def __confirmed(self, delivery_tag: int, multiple: bool) -> list:
+        if multiple:
+            tags = [tag for tag in self.unconfirmed if tag <= delivery_tag]
+        else:
+            tags = [delivery_tag] if delivery_tag in self.unconfirmed else []
+        return [self.unconfirmed.pop(tag) for tag in tags]
+
+
 class RabbitClient(EventBroker):
     def __init__(self, config: RabbitSettings, channels: List[str], logger: Logger):
         super().__init__(config, channels, logger)
         self.config = config
         self.channels = channels
         self.logger = logger
+        self.codec = Codec(config.codec)
         self.exchange = Exchange(name='digsinet', type='direct', durable=True)
         self.queues: List[Queue] = []
         for channel in self.channels:
             queue = Queue(channel, exchange=self.exchange, routing_key=channel)
             self.queues.append(queue)
         self.consumers: Dict[str, RabbitConsumer] = {}
+        self.publisher = None
+        self.publisher_pid = None
 
-    def __make_connection(self) -> Connection:
+    def make_connection(self) -> Connection:
         return Connection(hostname=self.config.host, userid=self.config.username,
                           password=self.config.password, port=self.config.port, heartbeat=10.0)
 
     def close(self):
-        for consumer in self.consumers.values():
+        for consumer in list(self.consumers.values()):
             consumer.close()
+        self.consumers.clear()
+        if self.publisher is not None and self.publisher_pid == os.getpid():
+            self.publisher.close()
+        self.publisher = None
 
     def close_consumer(self, consumer: str):
-        if consumer in self.consumers:
-            self.consumers[consumer].close()
-            del self.consumers[consumer]
+        rabbit_consumer = self.consumers.pop(consumer, None)
+        if rabbit_consumer is not None:
+            rabbit_consumer.close()
 
     def get_sibling_channels(self):
         return self.channels
@@ -92,34 +276,47 @@ class RabbitClient(EventBroker):
     def subscribe(self, channel: str, group_id: str = None):
         queue = Queue(channel, exchange=self.exchange, routing_key=channel)
         self.logger.info(f'Subscribing to channel {channel}')
-        conn = self.__make_connection()
+        conn = self.make_connection()
         print(queue.name)
         print(self.exchange)
-        consumer = RabbitConsumer(self.logger, conn, queue, self.exchange)
-        self.consumers[channel] = consumer
-        return channel, channel
+        consumer = RabbitConsumer(self.logger, conn, queue, self.exchange, self.config.prefetch_count, self.codec)
+        # every subscription gets its own key and connection, the consumers of a queue share its messages
+        key = channel + "_" + (group_id or "") + "_" + uuid.uuid4().hex
+        self.consumers[key] = consumer
+        return key, key
 
     def poll(self, consumer, timeout) -> RabbitMessage:
         if consumer in self.consumers:
-            if self.consumers[consumer].has_messages():
-                return self.consumers[consumer].messages.pop(0)
-            else:
-                return self.consumers[consumer].poll(timeout)
+            return self.consumers[consumer].poll(timeout)
         else:
             self.logger.warning('poll attempted for non existing consumer')
-            return RabbitMessage('')
+            return RabbitMessage(b'', self.codec)
+
+    def flush(self):
+        if self.publisher is not None and self.publisher_pid == os.getpid():
+            self.publisher.wait_for_confirms()
 
-    def publish(self, channel: str, data):
+    def poll_batch(self, consumer, max_messages: int, timeout) -> List[RabbitMessage]:
+        if consumer in self.consumers:
+            return self.consumers[consumer].poll_batch(max_messages, timeout)
+        else:
+            self.logger.warning('poll attempted for non existing consumer')
+            return []
+
+    def commit(self, consumer, message: RabbitMessage = None):
+        # messages are acknowledged by delivery order, acking the last one acks all polled messages
+        if consumer in self.consumers:
+            self.consumers[consumer].ack()
+
+    def publish(self, channel: str, data, key: str = None):
+        # every channel is a single queue delivering its messages in order, the key is not needed
         self.logger.info(f'Publishing message to channel {channel}...')
-        conn = self.__make_connection()
-        producer = Producer(conn)
-        producer.publish(
-            json.dumps(data, default=lambda obj: "<not serializable>"),
-            exchange=self.exchange,
-            routing_key=channel,
-            retry=True,
-            declare=self.queues
-        )
+        self.__get_publisher().publish(channel, self.codec.encode(data))
         self.logger.info(f'Published message to channel {channel}...')
-        producer.close()
-        conn.release()
+
+    def __get_publisher(self) -> RabbitPublisher:
+        # connections do not survive forking, every publishing process gets its own publisher
+        if self.publisher_pid != os.getpid():
+            self.publisher = RabbitPublisher(self)
+            self.publisher_pid = os.getpid()
+        return self.publisher
@@ -2,14 +2,31 @@
 
 from event.eventbroker import EventBroker
 from interfaces.interface import Interface
-from config import Settings, InterfaceSettings, InterfaceCredentials
+from interfaces.gnmi_pool import get_pool
+from interfaces.gnmi_writer import get_writer
+from interfaces.gnmi_path import (
+    join_path, split_path, split_get_response, is_stripped, strip_response, apply_notification
+)
+from interfaces.gnmi_diff import DiffEngine, patch_operations
+from interfaces.gnmi_snapshot import freeze
+from interfaces.gnmi_scheduler import PollScheduler
+from interfaces.gnmi_journal import get_journal
+from interfaces.gnmi_routing import RoutingTable
+from config import Settings, InterfaceSettings, InterfaceCredentials, InterfaceMode, SubscriptionMode, PathSettings
 
-import re
-import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from multiprocessing import Queue, Semaphore
-from pygnmi.client import gNMIclient
-from deepdiff import DeepDiff, grep
+import grpc
+from pygnmi.client import telemetryParser
+
+from multiprocessing import Queue
+
+# seconds to wait for the subscriptions to stop when the interface is closed
+SUBSCRIPTION_STOP_TIMEOUT = 3
+# key of the paths' content fingerprints in the model of a node
+FINGERPRINTS = "fingerprints"
 
 
 class gnmi(Interface):
@@ -28,8 +45,6 @@ class gnmi(Interface):
     topology_interface_config: InterfaceSettings
     toplogy_prefix: str
 
-    hostWriteSemaphores = dict[Semaphore]()
-
     def __init__(
         self,
         config: Settings,
@@ -60,6 +75,47 @@ class gnmi(Interface):
         )
         self.topology_prefix = topology_prefix
 
+        self.pool = get_pool(self.interface_config.connection_pool, logger)
+        self.writer = get_writer(self.interface_config, logger)
+        self.subscriptions = dict()
+        self.streams = dict()
+        self.executor = None
+        self.host_table = dict()
+        self.host_table_size = 0
+        self.resolved_nodes = None
+        self.diff_engine = DiffEngine(exclude_keys=("timestamp",))
+        self.journal = get_journal(self.diff_engine.fingerprint)
+        # number of diffed paths that were skipped (hits) or changed (misses) according to their fingerprint
+        self.fingerprint_hits = 0
+        self.fingerprint_misses = 0
+        self.fingerprint_lock = threading.Lock()
+        # data below the strip prefixes is removed before it is stored, diffed and published
+        self.strip_prefixes = [split_path(prefix) for prefix in self.topology_interface_config.strip]
+        self.paths = []
+        for path in self.topology_interface_config.paths:
+            if is_stripped(path.path, self.strip_prefixes):
+                self.logger.info(f"Not watching gNMI path {path.path} in topology {target_topology}, it is stripped")
+            else:
+                self.paths.append(path)
+        self.scheduler = PollScheduler(
+            self.paths,
+            config.sync_interval,
+            self.topology_interface_config.poll_jitter,
+        )
+        # notifications of the realnet are only published to the channels of the siblings syncing the node and path
+        self.routing = None
+        if target_topology == "realnet":
+            self.routing = RoutingTable(config.siblings, bool(config.realnet.apps))
+
+    def _session(self, host: str):
+        """
+        Borrow the pooled gNMI session for a host.
+
+        :param host: The hostname of the node.
+        :return: A context manager yielding a connected gNMIclient.
+        """
+        return self.pool.session(host, self.port, self.username, self.password)
+
     def _checkNode(self, nodes, node_name):
         """
         Check if the node exists in the model and if it matches the regex defined in the gnmi-sync config for the siblings
@@ -70,34 +126,61 @@ class gnmi(Interface):
         :return: The hostname of the node or None if node does not exist or should not be updated.
 
         """
-        # if the gNMI data for the node's name exists in the model
-        if nodes is not None and len(nodes) > 0 and nodes.get(node_name) is not None:
-            # if the node matches the regex defined in the gnmi-sync config for the siblings
-            if re.fullmatch(self.topology_interface_config.nodes, node_name):
-                # TODO: hostname is still limited to containerlab syntax (clab_prefix-topology_name-node_name)
-                if self.target_topo == "realnet":
-                    host = (
-                        self.topology_prefix
-                        + "-"
-                        + self.topology_name
-                        + "-"
-                        + node_name
-                    )
-                else:
-                    host = (
-                        self.topology_prefix
-                        + "-"
-                        + self.topology_name
-                        + "_"
-                        + self.target_topo
-                        + "-"
-                        + node_name
-                    )
+        if nodes is not None and len(nodes) > 0:
+            return self._resolve_hosts(nodes).get(node_name)
 
-                if self.hostWriteSemaphores.get(host) is None:
-                    self.hostWriteSemaphores[host] = Semaphore(1)
+    def _resolve_hosts(self, nodes: dict) -> dict:
+        """
+        Get the table of hostnames of all nodes in the model matching the regex defined in the gnmi-sync config for
+        the siblings. The table is only rebuilt if the model of the network topology changed.
+
+        :param nodes: The model of the network topology.
+        :return: A dict of the hostnames by node name.
+        """
+        if nodes is not self.resolved_nodes or len(nodes) != self.host_table_size:
+            host_table = dict()
+            for node_name in nodes:
+                # if the gNMI data for the node's name exists in the model
+                # and the node matches the regex defined in the gnmi-sync config for the siblings
+                if nodes[node_name] is not None and self.topology_interface_config.nodes_regex.fullmatch(node_name):
+                    host_table[node_name] = self._hostname(node_name)
+            self.host_table = host_table
+            self.host_table_size = len(nodes)
+            self.resolved_nodes = nodes
+        return self.host_table
+
+    def invalidate_hosts(self):
+        """
+        Drop the table of hostnames, e.g., after the topology changed.
+        """
+        self.resolved_nodes = None
+
+    def topology_changed(self, siblings: dict):
+        """
+        Drop the table of hostnames and rebuild the routing table after the topology of a sibling was built or
+        changed.
 
-                return host
+        :param siblings: The state of the siblings, including the nodes of their topologies.
+        """
+        self.invalidate_hosts()
+        if self.routing is not None:
+            self.routing.rebuild(siblings)
+
+    def _hostname(self, node_name: str) -> str:
+        # TODO: hostname is still limited to containerlab syntax (clab_prefix-topology_name-node_name)
+        if self.target_topo == "realnet":
+            hostname = self.topology_prefix + "-" + self.topology_name + "-" + node_name
+        else:
+            hostname = (
+                self.topology_prefix
+                + "-"
+                + self.topology_name
+                + "_"
+                + self.target_topo
+                + "-"
+                + node_name
+            )
+        return self.interface_config.hosts.get(hostname, hostname)
 
     # TODO: remove queues parameter
     def getNodesUpdate(
@@ -114,80 +197,280 @@ class gnmi(Interface):
 
         """
         if nodes is not None and len(nodes) > 0:
+            if self.topology_interface_config.mode == InterfaceMode.SUBSCRIBE:
+                self._subscribe_nodes(nodes, broker, diff)
+                return nodes
+            polled_nodes = dict()
             for node in nodes:
-                use_diff = "differential" if diff else ""
-                self.logger.debug(
-                    f"<-- Getting {use_diff} gNMI data from {self.target_topo}..."
-                )
                 host = self._checkNode(nodes, node)
                 if host is not None:
-                    try:
-                        with gNMIclient(
-                            target=(host, self.port),
-                            username=self.username,
-                            password=self.password,
-                            insecure=True,
-                        ) as gc:
-                            for path in self.topology_interface_config.paths:
-                                if diff is True:
-                                    nodes[node] = self._process_diff(
-                                        node, path, nodes[node], gc, broker
-                                    )
-                                else:
-                                    nodes[node] = self._process_no_diff(
-                                        node, path, nodes[node], gc, broker
-                                    )
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error getting gNMI data from {host} in topology {self.target_topo}: {str(e)}"
-                        )
+                    polled_nodes[node] = host
+            self.scheduler.retain(polled_nodes)
+            if self.topology_interface_config.max_in_flight > 1 and len(polled_nodes) > 1:
+                # poll nodes concurrently, each node's paths are still processed in order by a single worker
+                executor = self._get_executor()
+                futures = dict()
+                for node, host in polled_nodes.items():
+                    futures[node] = executor.submit(
+                        self._poll_node, node, host, nodes[node], broker, diff
+                    )
+                for node, future in futures.items():
+                    nodes[node] = future.result()
+            else:
+                for node, host in polled_nodes.items():
+                    nodes[node] = self._poll_node(node, host, nodes[node], broker, diff)
+            self.logger.debug(
+                f"gNMI fingerprints in topology {self.target_topo}: {self.fingerprint_hits} unchanged, "
+                f"{self.fingerprint_misses} changed"
+            )
         else:
             self.logger.warning(
                 f"Warning: No nodes to get gNMI data from in topology {self.target_topo}..."
             )
         return nodes
 
-    def _process_diff(self, node, path, node_paths, gc, broker: EventBroker):
-        if node_paths.get(path) is not None:
-            old_node_path_data = copy.deepcopy(node_paths[path])
-        else:
-            old_node_path_data = None
-        node_path_data = gc.get(
-            path=[path], datatype=self.topology_interface_config.datatype
+    def _poll_node(self, node, host, node_paths, broker: EventBroker, diff: bool):
+        """
+        Get the paths of a node that are due according to the poll scheduler and report the updates.
+
+        :param node: The name of the node.
+        :param host: The hostname of the node.
+        :param node_paths: The model of the node's paths.
+        :param broker: The event broker to send the updates to.
+        :param diff: Whether to calculate and only report back differential data or not.
+        :return: The updated model of the node's paths.
+        """
+        paths = self.scheduler.due(node)
+        if len(paths) == 0:
+            return node_paths
+        use_diff = "differential" if diff else ""
+        self.logger.debug(
+            f"<-- Getting {use_diff} gNMI data of {len(paths)} paths from {host} in {self.target_topo}..."
         )
-        node_paths[path] = copy.deepcopy(node_path_data)
-        diff = self._calculate_diff(old_node_path_data, node_path_data)
-        self._send_update_to_queues(node, path, node_path_data, diff, broker)
+        try:
+            with self._session(host) as gc:
+                node_paths_data = self._get_paths(gc, paths)
+            for path in paths:
+                if node_paths_data.get(path.path) is None:
+                    # the node returned no data of the path, keep its last data instead of reporting it as deleted
+                    self.scheduler.record(node, path, changed=False)
+                    continue
+                fingerprint = node_paths.get(FINGERPRINTS, {}).get(path.path)
+                node_paths = self._process_update(
+                    node, path.path, node_paths, node_paths_data[path.path], broker, diff
+                )
+                self.scheduler.record(node, path, node_paths[FINGERPRINTS].get(path.path) != fingerprint)
+        except Exception as e:
+            self.logger.error(
+                f"Error getting gNMI data from {host} in topology {self.target_topo}: {str(e)}"
+            )
+            # back off on failing nodes as if they were unchanged
+            for path in paths:
+                self.scheduler.record(node, path, changed=False)
         return node_paths
 
-    def _process_no_diff(self, node, path, node_paths, gc, broker: EventBroker):
-        node_path_data = gc.get(
-            path=[path], datatype=self.topology_interface_config.datatype
-        )
-        node_paths[path] = copy.deepcopy(node_path_data)
-        self._send_update_to_queues(node, path, node_path_data, None, broker)
+    def get_next_poll_delay(self):
+        """
+        Get the time until the next path is due for polling.
+
+        :return: The delay in seconds or None if no path was scheduled yet.
+        """
+        if self.topology_interface_config.mode == InterfaceMode.SUBSCRIBE:
+            return None
+        return self.scheduler.next_poll_delay()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.topology_interface_config.max_in_flight,
+                thread_name_prefix=f"gNMI poller {self.target_topo}",
+            )
+        return self.executor
+
+    def _subscribe_nodes(self, nodes: dict, broker: EventBroker, diff: bool):
+        """
+        Make sure a streaming subscription is running for every path of every node. Subscriptions that ended, e.g.,
+        due to a connection loss, are restarted.
+
+        :param nodes: The model of the network topology.
+        :param broker: The event broker to send the updates to.
+        :param diff: Whether to calculate and only report back differential data or not.
+        """
+        for node in nodes:
+            host = self._checkNode(nodes, node)
+            if host is not None:
+                for path in self.paths:
+                    subscription = self.subscriptions.get((node, path.path))
+                    if subscription is None or not subscription.is_alive():
+                        self.logger.debug(
+                            f"<-- Subscribing to gNMI path {path.path} on {host} in topology {self.target_topo}..."
+                        )
+                        subscription = threading.Thread(
+                            target=self._stream_updates,
+                            args=(node, host, path, nodes[node], broker, diff),
+                            name=f"gNMI subscription {host} {path.path}",
+                            daemon=True,
+                        )
+                        self.subscriptions[(node, path.path)] = subscription
+                        subscription.start()
+
+    def _stream_updates(self, node, host, path: PathSettings, node_paths, broker: EventBroker, diff: bool):
+        """
+        Run a streaming subscription for a path of a node until it fails or the interface is closed.
+
+        The path is retrieved once using a Get, afterwards the updates and deletes received from the node are applied
+        to the last data of the path, so siblings get the same notification payload as in poll mode without another
+        round trip to the node.
+        """
+        key = (node, path.path)
+        sample_interval = 0
+        if self.topology_interface_config.subscription_mode == SubscriptionMode.SAMPLE:
+            sample_interval = int(self.topology_interface_config.sample_interval * 1e9)
+        try:
+            with self._session(host) as gc:
+                stream = gc.subscribe(
+                    subscribe={
+                        "subscription": [
+                            {
+                                "path": path.path,
+                                "mode": self.topology_interface_config.subscription_mode.value,
+                                "sample_interval": sample_interval,
+                            }
+                        ],
+                        "mode": "stream",
+                        "updates_only": True,
+                    }
+                )
+                self.streams[key] = stream
+                try:
+                    if self.subscriptions.get(key) is not threading.current_thread():
+                        # the interface was closed while subscribing
+                        return
+                    node_path_data = self._get_path(gc, path)
+                    self._process_update(node, path.path, node_paths, node_path_data, broker, diff)
+                    for message in stream:
+                        notification = telemetryParser(message)
+                        if notification is None or not notification.get("update"):
+                            continue
+                        node_path_data = apply_notification(
+                            node_paths.get(path.path, node_path_data), notification["update"]
+                        )
+                        self._process_update(node, path.path, node_paths, node_path_data, broker, diff)
+                    raise ConnectionError("subscription stream closed by target")
+                finally:
+                    stream.cancel()
+                    if self.streams.get(key) is stream:
+                        del self.streams[key]
+        except grpc.RpcError as e:
+            # close() cancels the streams, a cancelled stream of a closed subscription is a normal exit
+            if e.code() != grpc.StatusCode.CANCELLED and self.subscriptions.get(key) is threading.current_thread():
+                self.logger.error(
+                    f"Error in gNMI subscription to {path.path} on {host} in topology {self.target_topo}: {str(e)}"
+                )
+        except Exception as e:
+            if self.subscriptions.get(key) is threading.current_thread():
+                self.logger.error(
+                    f"Error in gNMI subscription to {path.path} on {host} in topology {self.target_topo}: {str(e)}"
+                )
+
+    def _get_path(self, gc, path: PathSettings) -> dict:
+        return gc.get(path=[path.path], datatype=path.datatype or self.topology_interface_config.datatype)
+
+    def _get_paths(self, gc, paths: list[PathSettings]) -> dict:
+        """
+        Get the data of several paths of a node. If batching is enabled, all paths with the same datatype are
+        retrieved using a single Get request and the response is split into the data of the individual paths.
+
+        :param gc: The gNMI client of the node.
+        :param paths: The settings of the paths to get.
+        :return: A dict of the Get response for every path, None if a batched response contains no data of a path.
+        """
+        if not self.topology_interface_config.batch_get:
+            return {path.path: self._get_path(gc, path) for path in paths}
+        paths_data = dict()
+        for datatype, datatype_paths in self._group_paths_by_datatype(paths).items():
+            response = gc.get(path=datatype_paths, datatype=datatype)
+            paths_data.update(split_get_response(response, datatype_paths))
+        return paths_data
+
+    def _group_paths_by_datatype(self, paths: list[PathSettings]) -> dict:
+        datatype_paths = dict()
+        for path in paths:
+            datatype = path.datatype or self.topology_interface_config.datatype
+            datatype_paths.setdefault(datatype, []).append(path.path)
+        return datatype_paths
+
+    def _process_update(self, node, path, node_paths, node_path_data, broker: EventBroker, diff: bool):
+        node_path_data = strip_response(node_path_data, self.strip_prefixes)
+        if diff is True:
+            return self._process_diff(node, path, node_paths, node_path_data, broker)
+        else:
+            return self._process_no_diff(node, path, node_paths, node_path_data, broker)
+
+    def close(self):
+        """
+        Stop all subscriptions and close the sessions to the nodes of this interface. The subscriptions are stopped
+        before their sessions are closed, so they do not fail while still streaming. Sessions to other nodes stay
+        open, e.g., for the interfaces of a sibling when the interfaces of its replaced topology are closed.
+        """
+        subscriptions = list(self.subscriptions.values())
+        self.subscriptions.clear()
+        for stream in list(self.streams.values()):
+            stream.cancel()
+        deadline = time.monotonic() + SUBSCRIPTION_STOP_TIMEOUT
+        for subscription in subscriptions:
+            subscription.join(max(0.0, deadline - time.monotonic()))
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for host in set(self.host_table.values()):
+            self.pool.discard(host)
+
+    def _process_diff(self, node, path, node_paths, node_path_data, broker: EventBroker):
+        fingerprint = self.diff_engine.fingerprint(node_path_data)
+        fingerprints = node_paths.setdefault(FINGERPRINTS, dict())
+        if path in node_paths and fingerprints.get(path) == fingerprint:
+            # nothing but timestamps changed, skip copying, diffing and publishing
+            self._count_fingerprint(hit=True)
+            return node_paths
+        self._count_fingerprint(hit=False)
+        # snapshots are immutable, the old one can be kept as is and unchanged subtrees are shared with the new one
+        old_node_path_data = node_paths.get(path)
+        node_path_data = freeze(node_path_data, old_node_path_data)
+        node_paths[path] = node_path_data
+        fingerprints[path] = fingerprint
+        patch = self.diff_engine.patch(old_node_path_data, node_path_data)
+        # changes that are echoes of our own writes are kept in the new state but not reported back
+        changes = self.journal.filter_echoes(self._hostname(node), patch)
+        if len(changes) < len(patch):
+            self.logger.debug(
+                f"Suppressing {len(patch) - len(changes)} echoes of own gNMI writes to {path} on node {node} "
+                f"in topology {self.target_topo}"
+            )
+        self._send_update_to_queues(node, path, changes, broker)
         return node_paths
 
-    def _calculate_diff(self, old_data, new_data):
-        # TODO evaluate gNMIclient show_diff?
-        if new_data | grep("Hello World! update for node"):
-            # if the new data contains the "Hello World! update for node" string, return an empty diff
-            # this excludes hello_world app updates from the diff
-            return {}
-        # exclude_timestamp = re.compile(r"\['timestamp'\]")
-        # node_data_diff = DeepDiff(old_data, new_data, ignore_order=True, exclude_regex_paths=[exclude_timestamp])
-        node_data_diff = DeepDiff(
-            old_data,
-            new_data,
-            ignore_order=True,
-            exclude_regex_paths="\\['timestamp'\\]",
-        )
-        return node_data_diff.tree
+    def _process_no_diff(self, node, path, node_paths, node_path_data, broker: EventBroker):
+        node_path_data = freeze(node_path_data, node_paths.get(path))
+        node_paths[path] = node_path_data
+        node_paths.setdefault(FINGERPRINTS, dict())[path] = self.diff_engine.fingerprint(node_path_data)
+        self._send_update_to_queues(node, path, None, broker)
+        return node_paths
 
-    def _send_update_to_queues(self, node, path, node_data, diff, broker: EventBroker):
+    def _count_fingerprint(self, hit: bool):
+        with self.fingerprint_lock:
+            if hit:
+                self.fingerprint_hits += 1
+            else:
+                self.fingerprint_misses += 1
+
+    def _send_update_to_queues(self, node, path, patch, broker: EventBroker):
         # if differential data exists and is empty, don't send updates the queues
-        if diff is not None and len(diff) > 0:
-            for channel in broker.get_sibling_channels():
+        if patch is not None and len(patch) > 0:
+            channels = broker.get_sibling_channels()
+            if self.routing is not None:
+                channels = self.routing.channels(channels, node, path)
+            for channel in channels:
                 broker.publish(
                     channel,
                     {
@@ -195,9 +478,10 @@ class gnmi(Interface):
                         "source": self.target_topo,
                         "node": node,
                         "path": path,
-                        "data": node_data,
-                        "diff": diff,
+                        "patch": patch,
                     },
+                    # keep the notifications of a node in order
+                    key=node,
                 )
 
     def setNodeUpdate(
@@ -210,35 +494,38 @@ class gnmi(Interface):
                 f"--> Syncing gNMI data to node {node_name} in topology {self.target_topo}: "
                 f"{str(notification_data)}..."
             )
-            try:
-                with gNMIclient(
-                    target=(host, self.port),
-                    username=self.username,
-                    password=self.password,
-                    insecure=True,
-                ) as gc:
-                    # for each notification in the notification data
-                    for notification in notification_data["notification"]:
-                        # if the notification is an update
-                        if notification.get("update"):
-                            for update in notification["update"]:
-                                self.hostWriteSemaphores[host].acquire()
-                                # turn update to replace, gygnmi get delivers updates, but updating, e.g.,
-                                # ip address in interface config requires replacing it, otherwise we get gRPC errors
-                                result = gc.set(
-                                    replace=[(str(path), dict(update["val"]))]
-                                )
-                                self.hostWriteSemaphores[host].release()
-                                self.logger.debug("gNMI set result: " + str(result))
-                        else:
-                            self.logger.info(
-                                "Unsupported gNMI notification type: "
-                                + str(notification)
-                            )
-            except Exception as e:
-                self.logger.error(
-                    f"Error syncing gNMI data to {host} in topology {self.target_topo}: {str(e)}"
-                )
+            operations = []
+            # for each notification in the notification data
+            for notification in notification_data["notification"]:
+                # if the notification is an update or delete
+                if notification.get("update") or notification.get("delete"):
+                    for update in notification.get("update") or []:
+                        # turn update to replace, gygnmi get delivers updates, but updating, e.g.,
+                        # ip address in interface config requires replacing it, otherwise we get gRPC errors
+                        operations.append(("replace", str(path), dict(update["val"])))
+                    for deleted_path in notification.get("delete") or []:
+                        operations.append(
+                            ("delete", join_path(notification.get("prefix"), deleted_path), None)
+                        )
+                else:
+                    self.logger.info(
+                        "Unsupported gNMI notification type: "
+                        + str(notification)
+                    )
+            if len(operations) > 0:
+                self._submit(host, operations)
+
+    def setNodePatch(self, nodes: dict, node_name: str, patch: list):
+        host = self._checkNode(nodes, node_name)
+
+        if host is not None:
+            self.logger.debug(
+                f"--> Syncing {len(patch)} changed gNMI leaves to node {node_name} in topology {self.target_topo}: "
+                f"{str(patch)}..."
+            )
+            operations = patch_operations(patch)
+            if len(operations) > 0:
+                self._submit(host, operations)
 
     def set(self, nodes: dict, node_name: str, op: str, data: dict):
         host = self._checkNode(nodes, node_name)
@@ -248,26 +535,25 @@ class gnmi(Interface):
                 f"--> Setting gNMI data on node {node_name} in topology {self.target_topo}: {str(data)}..."
             )
             try:
-                with gNMIclient(
-                    target=(host, self.port),
-                    username=self.username,
-                    password=self.password,
-                    insecure=True,
-                ) as gc:
-                    # for each notification in the notification data
-                    self.hostWriteSemaphores[host].acquire()
-                    match op:
-                        case "update":
-                            result = gc.set(update=data)
-                        case "replace":
-                            result = gc.set(replace=data)
-                        case "delete":
-                            result = gc.set(delete=data)
-                        case _:
-                            raise Exception("Unsupported gNMI operation: " + op)
-                    self.hostWriteSemaphores[host].release()
-                    self.logger.debug("gNMI set result: " + str(result))
+                match op:
+                    case "update" | "replace":
+                        operations = [(op, str(entry[0]), entry[1]) for entry in data]
+                    case "delete":
+                        operations = [(op, str(entry), None) for entry in data]
+                    case _:
+                        raise Exception("Unsupported gNMI operation: " + op)
+                self._submit(host, operations)
             except Exception as e:
                 self.logger.error(
                     f"Error setting gNMI data on {host} in topology {self.target_topo}: {str(e)}"
                 )
+
+    def _submit(self, host: str, operations: list):
+        """
+        Journal writes to a host and queue them in the write actor.
+
+        :param host: The hostname of the node.
+        :param operations: List of (op, path, value) tuples, value is None for delete operations.
+        """
+        self.journal.record(host, operations, self.topology_interface_config.write_journal_ttl)
+        self.writer.submit(host, operations)
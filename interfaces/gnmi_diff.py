@@ -0,0 +1,175 @@
+"""Structural diff of gNMI JSON trees"""
+
+import json
+import hashlib
+
+from interfaces.gnmi_path import join_path
+
+# operations of a patch, named like the gNMI set operations they are applied with
+PATCH_REPLACE = "replace"
+PATCH_DELETE = "delete"
+
+
+class DiffEngine:
+    """
+    Diff engine for gNMI JSON trees.
+
+    List entries are matched by their key (e.g., the name of an interface) instead of comparing every entry with
+    every other entry, excluded keys are ignored anywhere in the tree and identical subtrees are skipped without
+    descending into them.
+
+    Attributes:
+        exclude_keys (frozenset): dict keys that are ignored anywhere in the tree
+        list_keys (tuple): keys used to match list entries, in order of preference
+    """
+
+    def __init__(self, exclude_keys=("timestamp",), list_keys=("name", "index", "id")):
+        self.exclude_keys = frozenset(exclude_keys)
+        self.list_keys = tuple(list_keys)
+
+    def patch(self, old, new) -> list:
+        """
+        Calculate the changes between two gNMI Get responses as a patch of leaf operations.
+
+        Every change is a dict with the op (replace or delete), the gNMI path of the changed leaf, list entry or
+        container and, for replace operations, its new value. List entries are addressed by their key (e.g.,
+        interface[name=Ethernet1]), lists without a key and leaf-lists are replaced as a whole. A change of a single
+        leaf therefore only contains the leaf instead of the whole subtree of the polled path. The patch only
+        contains plain JSON types and can be published as is.
+
+        :param old: The old response, may be None.
+        :param new: The new response.
+        :return: The list of changes, empty if the responses are equal.
+        """
+        changes = []
+        old_updates = _update_values(old)
+        new_updates = _update_values(new)
+        for path, value in new_updates.items():
+            if path not in old_updates:
+                changes.append({"op": PATCH_REPLACE, "path": path, "value": value})
+            elif old_updates[path] is not value and old_updates[path] != value:
+                self._patch(old_updates[path], value, path, changes)
+        for path in old_updates:
+            if path not in new_updates:
+                changes.append({"op": PATCH_DELETE, "path": path})
+        old_deletes = _deleted_paths(old)
+        for path in _deleted_paths(new):
+            if path not in old_deletes and path not in new_updates:
+                changes.append({"op": PATCH_DELETE, "path": path})
+        return changes
+
+    def _patch(self, old, new, path: str, changes: list):
+        if old is new:
+            return
+        if isinstance(old, dict) and isinstance(new, dict):
+            self._patch_dict(old, new, path, changes)
+            return
+        if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+            list_key = self._list_key(old, new)
+            if list_key is not None:
+                self._patch_list(old, new, list_key, path, changes)
+                return
+        if type(old) is not type(new) or old != new:
+            # leaves, leaf-lists and lists without a key are replaced as a whole
+            changes.append({"op": PATCH_REPLACE, "path": path, "value": new})
+
+    def _patch_dict(self, old: dict, new: dict, path: str, changes: list):
+        for key, value in old.items():
+            if key in self.exclude_keys:
+                continue
+            if key not in new:
+                changes.append({"op": PATCH_DELETE, "path": _child_path(path, key)})
+            elif value is not new[key] and value != new[key]:
+                self._patch(value, new[key], _child_path(path, key), changes)
+        for key, value in new.items():
+            if key in self.exclude_keys or key in old:
+                continue
+            changes.append({"op": PATCH_REPLACE, "path": _child_path(path, key), "value": value})
+
+    def _patch_list(self, old, new, list_key: str, path: str, changes: list):
+        old_entries = {entry[list_key]: entry for entry in old}
+        new_entries = {entry[list_key]: entry for entry in new}
+        for key, entry in old_entries.items():
+            entry_path = f"{path}[{list_key}={_key_value(key)}]"
+            if key not in new_entries:
+                changes.append({"op": PATCH_DELETE, "path": entry_path})
+            elif entry is not new_entries[key] and entry != new_entries[key]:
+                self._patch_dict(entry, new_entries[key], entry_path, changes)
+        for key, entry in new_entries.items():
+            if key not in old_entries:
+                changes.append({"op": PATCH_REPLACE, "path": f"{path}[{list_key}={_key_value(key)}]", "value": entry})
+
+    def fingerprint(self, data) -> str:
+        """
+        Calculate a canonical hash of a gNMI JSON tree, ignoring the excluded keys (e.g., timestamps).
+
+        :param data: The tree.
+        :return: The hex digest of the tree.
+        """
+        canonical = json.dumps(self._canonical(data), sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _canonical(self, data):
+        if isinstance(data, dict):
+            return {key: self._canonical(value) for key, value in data.items() if key not in self.exclude_keys}
+        if isinstance(data, (list, tuple)):
+            return [self._canonical(value) for value in data]
+        return data
+
+    def _list_key(self, old, new):
+        """
+        Find a key that identifies the entries of both lists.
+        """
+        if len(old) == 0 or len(new) == 0:
+            return None
+        for list_key in self.list_keys:
+            if all(_has_key(entry, list_key) for entry in old) and all(_has_key(entry, list_key) for entry in new):
+                if len({entry[list_key] for entry in old}) == len(old) and len(
+                    {entry[list_key] for entry in new}
+                ) == len(new):
+                    return list_key
+        return None
+
+
+def patch_operations(patch: list) -> list:
+    """
+    Convert a patch into operations for the gNMI write actor.
+
+    :param patch: The list of changes as returned by DiffEngine.patch.
+    :return: List of (op, path, value) tuples, value is None for delete operations.
+    """
+    return [(change["op"], change["path"], change.get("value")) for change in patch]
+
+
+def _update_values(response) -> dict:
+    """
+    Get the value of every update of a Get response by its full path.
+    """
+    values = dict()
+    for notification in (response or {}).get("notification") or []:
+        for update in notification.get("update") or []:
+            values[join_path(notification.get("prefix"), update.get("path"))] = update.get("val")
+    return values
+
+
+def _deleted_paths(response) -> set:
+    return {
+        join_path(notification.get("prefix"), path)
+        for notification in (response or {}).get("notification") or []
+        for path in notification.get("delete") or []
+    }
+
+
+def _child_path(path: str, name: str) -> str:
+    return f"{path}/{name}" if path else name
+
+
+def _key_value(value) -> str:
+    # gNMI paths use the JSON representation of boolean keys
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _has_key(entry, key) -> bool:
+    return isinstance(entry, dict) and key in entry and isinstance(entry[key], (str, int, float, bool))
@@ -0,0 +1,151 @@
+"""Journal of the gNMI writes done by DigSiNet, used to suppress their echoes"""
+
+import os
+import time
+import threading
+
+from interfaces.gnmi_path import split_path, path_startswith, lookup_value
+
+# number of records after which expired entries are purged
+PURGE_INTERVAL = 256
+# marker for values that are not contained in polled data
+_MISSING = object()
+
+
+class _JournalEntry:
+    """
+    A write to a path of a host.
+    """
+
+    def __init__(self, op: str, value, fingerprint: str, expires: float):
+        self.op = op
+        self.value = value
+        self.fingerprint = fingerprint
+        self.expires = expires
+
+
+class WriteJournal:
+    """
+    Journal of the writes submitted by the gNMI interfaces of a process.
+
+    When a node is polled, the journal tells which changes of the polled data are just the echoes of writes DigSiNet
+    did itself (e.g., a realnet change synced to a sibling or an app setting a value), so they are not published
+    again, while other changes of the same path still are. Entries are keyed by host and normalized path and only
+    the latest write to a path is kept, like in the write actor. Writes can target the polled path itself or leaves
+    below it (e.g., when a patch is synced). Entries expire after a TTL, so values written back by others are not
+    suppressed forever.
+
+    Attributes:
+        entries (dict): the latest write of every normalized path by host
+    """
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.entries = dict()
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def record(self, host: str, operations: list, ttl: float):
+        """
+        Record writes submitted to a host.
+
+        :param host: The hostname of the node.
+        :param operations: List of (op, path, value) tuples, value is None for delete operations.
+        :param ttl: Seconds the writes are considered for echo suppression.
+        """
+        now = time.monotonic()
+        with self.lock:
+            for op, path, value in operations:
+                fingerprint = self.fingerprint(value) if value is not None else None
+                self.entries.setdefault(host, dict())[split_path(path)] = _JournalEntry(
+                    op, value, fingerprint, now + ttl
+                )
+            self.records += 1
+            if self.records >= PURGE_INTERVAL:
+                self.records = 0
+                for host_entries in self.entries.values():
+                    for key in [key for key, entry in host_entries.items() if entry.expires < now]:
+                        del host_entries[key]
+
+    def filter_echoes(self, host: str, patch: list) -> list:
+        """
+        Remove the changes of a patch that are explained by the latest writes to a host, i.e., the echoes of own
+        writes.
+
+        A change is an echo if it lies within a written path and its value equals the value written there, or if it
+        deletes something a delete or a replace of a containing path removed. Changes containing a written path and
+        changes of paths that were not written are kept, so external changes are still reported while writes did not
+        expire.
+
+        :param host: The hostname of the node.
+        :param patch: The list of changes as returned by DiffEngine.patch.
+        :return: The changes that are not explained by own writes that did not expire.
+        """
+        host_entries = self.entries.get(host)
+        if not host_entries or len(patch) == 0:
+            return patch
+        now = time.monotonic()
+        with self.lock:
+            entries = [(elements, entry) for elements, entry in host_entries.items() if entry.expires >= now]
+        if len(entries) == 0:
+            return patch
+        return [change for change in patch if not self._explained(change, entries)]
+
+    def _explained(self, change: dict, entries: list) -> bool:
+        elements = split_path(change["path"])
+        for entry_elements, entry in entries:
+            if not path_startswith(elements, entry_elements):
+                continue
+            if entry.op == "delete":
+                if change["op"] == "delete":
+                    return True
+                continue
+            value = lookup_value(entry.value, elements[len(entry_elements):], _MISSING)
+            if change["op"] == "delete":
+                # a replace removes everything it does not contain, an update leaves it alone
+                if entry.op == "replace" and value is _MISSING:
+                    return True
+            elif value is not _MISSING:
+                fingerprint = entry.fingerprint if value is entry.value else self.fingerprint(value)
+                if self.fingerprint(change.get("value")) == fingerprint or _contains(change.get("value"), value):
+                    return True
+        return False
+
+
+def _contains(data, value) -> bool:
+    """
+    Check if all leaves of a written value are contained in the data, ignoring YANG module prefixes of keys.
+    """
+    if isinstance(value, dict):
+        if not isinstance(data, dict):
+            return False
+        names = {key.rpartition(":")[2]: child for key, child in data.items()}
+        for key, child in value.items():
+            name = key.rpartition(":")[2]
+            if name not in names or not _contains(names[name], child):
+                return False
+        return True
+    if isinstance(value, (list, tuple)):
+        if not isinstance(data, (list, tuple)):
+            return False
+        return all(any(_contains(entry, child) for entry in data) for child in value)
+    return data == value
+
+
+_journal: WriteJournal = None
+_journal_pid = None
+
+
+def get_journal(fingerprint) -> WriteJournal:
+    """
+    Get the write journal of the current process. Every process (e.g., every controller) has its own journal, as it
+    only needs to recognize the echoes of the writes it submitted itself.
+
+    :param fingerprint: The function calculating the fingerprint of written values.
+    :return: The write journal.
+    """
+    global _journal, _journal_pid
+    if _journal is None or _journal_pid != os.getpid():
+        _journal = WriteJournal(fingerprint)
+        _journal_pid = os.getpid()
+    return _journal
@@ -0,0 +1,379 @@
+"""Helpers for gNMI path strings and Get responses"""
+
+from functools import lru_cache
+
+# marker for subtrees that are not contained in a value
+_MISSING = object()
+
+
+@lru_cache(maxsize=4096)
+def split_path(path: str) -> tuple:
+    """
+    Split a gNMI path string into its elements.
+
+    Origins and YANG module prefixes are removed and keys are sorted, so paths as configured (e.g.,
+    "openconfig:interfaces/interface[name=Ethernet1]") and paths as returned by pygnmi (e.g.,
+    "interfaces/interface[name=Ethernet1]") result in the same elements.
+
+    :param path: The gNMI path string.
+    :return: A tuple of (name, ((key, value), ...)) elements.
+    """
+    segments = []
+    segment = ""
+    depth = 0
+    # key values may contain slashes, e.g., interface names, so only split outside of brackets
+    for char in path or "":
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        if char == "/" and depth == 0:
+            segments.append(segment)
+            segment = ""
+        else:
+            segment += char
+    segments.append(segment)
+
+    elements = []
+    for segment in segments:
+        if not segment:
+            continue
+        name, _, keys = segment.partition("[")
+        name = name.rpartition(":")[2]
+        element_keys = []
+        if keys:
+            for key in ("[" + keys)[1:-1].split("]["):
+                key_name, _, key_value = key.partition("=")
+                element_keys.append((key_name.rpartition(":")[2], key_value))
+        if name:
+            elements.append((name, tuple(sorted(element_keys))))
+    return tuple(elements)
+
+
+def join_path(prefix: str, path: str) -> str:
+    """
+    Join a gNMI prefix and path as returned by pygnmi.
+
+    :param prefix: The prefix, may be None.
+    :param path: The path relative to the prefix, may be None.
+    :return: The joined path.
+    """
+    return "/".join(part for part in (prefix, path) if part)
+
+
+def format_path(elements: tuple) -> str:
+    """
+    Format path elements as a normalized gNMI path string.
+
+    :param elements: The path elements as returned by split_path.
+    :return: The path string, e.g., "interfaces/interface[name=Ethernet1]".
+    """
+    return "/".join(name + "".join(f"[{key}={value}]" for key, value in keys) for name, keys in elements)
+
+
+def path_startswith(elements: tuple, prefix: tuple) -> bool:
+    """
+    Check if path elements start with the elements of a prefix. Names and key values of "*" in the prefix match any
+    name or key value.
+
+    :param elements: The path elements as returned by split_path.
+    :param prefix: The prefix elements as returned by split_path.
+    :return: Whether the path starts with the prefix.
+    """
+    if len(prefix) > len(elements):
+        return False
+    for (name, keys), (prefix_name, prefix_keys) in zip(elements, prefix):
+        if prefix_name != "*" and prefix_name != name:
+            return False
+        if prefix_keys != keys:
+            if len(prefix_keys) != len(keys):
+                return False
+            for (key, value), (prefix_key, prefix_value) in zip(keys, prefix_keys):
+                if key != prefix_key or (prefix_value != "*" and prefix_value != value):
+                    return False
+    return True
+
+
+def split_get_response(response: dict, paths: list) -> dict:
+    """
+    Split the response of a Get request for several paths into one response per requested path.
+
+    Updates are assigned to the most specific requested path they are contained in. If the target only returned a
+    parent container of a requested path, the requested subtree is cut out of the container's value and assigned as
+    an update of the normalized requested path. If an update can not be assigned that way and the target returned
+    one notification per requested path, the notification's position is used.
+
+    :param response: The Get response as returned by pygnmi.
+    :param paths: The requested paths.
+    :return: A dict of the Get response for every requested path, None if the response contains no data of a path.
+    """
+    path_elements = [(path, split_path(path)) for path in paths]
+    path_notifications = dict()
+    # subtrees cut out of parent containers, their updates carry the normalized requested path
+    path_subtrees = dict()
+    notifications = response.get("notification", []) if response else []
+    for index, notification in enumerate(notifications):
+        path_updates = dict()
+        notification_subtrees = dict()
+        for update in notification.get("update") or []:
+            elements = split_path(join_path(notification.get("prefix"), update.get("path")))
+            # an update answers the most specific requested path it lies within, e.g., of overlapping paths
+            containing = [requested for _, requested in path_elements if path_startswith(elements, requested)]
+            depth = max((len(requested) for requested in containing), default=None)
+            matched = False
+            for path, requested in path_elements:
+                if path_startswith(elements, requested):
+                    if len(requested) == depth:
+                        path_updates.setdefault(path, []).append(update)
+                    matched = True
+                elif path_startswith(requested, elements):
+                    matched = True
+                    value = lookup_value(update.get("val"), requested[len(elements):], _MISSING)
+                    if value is not _MISSING:
+                        subtree = dict(update)
+                        subtree["path"] = format_path(requested)
+                        subtree["val"] = value
+                        notification_subtrees.setdefault(path, []).append(subtree)
+            if not matched and len(notifications) == len(paths):
+                path_updates.setdefault(paths[index], []).append(update)
+        for path, updates in path_updates.items():
+            path_notification = dict(notification)
+            path_notification["update"] = updates
+            path_notifications.setdefault(path, []).append(path_notification)
+        for path, updates in notification_subtrees.items():
+            path_notification = dict(notification)
+            path_notification["prefix"] = None
+            path_notification["update"] = updates
+            path_subtrees.setdefault(path, []).append(path_notification)
+    # subtrees are only used for paths without own updates, e.g., when overlapping paths are requested
+    for path, subtree_notifications in path_subtrees.items():
+        if path not in path_notifications:
+            path_notifications[path] = subtree_notifications
+
+    split = dict()
+    for path in paths:
+        if path in path_notifications:
+            split[path] = {"notification": path_notifications[path]}
+        else:
+            split[path] = None
+    return split
+
+
+def lookup_value(value, elements: tuple, default=None):
+    """
+    Get the subtree at the given path elements from a JSON value, ignoring YANG module prefixes of keys.
+
+    :param value: The JSON value, e.g., the value of an update.
+    :param elements: The path elements relative to the value as returned by split_path.
+    :param default: The result if the value contains no subtree at the path.
+    :return: The subtree.
+    """
+    for name, keys in elements:
+        if not isinstance(value, dict):
+            return default
+        children = {key.rpartition(":")[2]: child for key, child in value.items()}
+        if name not in children:
+            return default
+        value = children[name]
+        if keys:
+            if not isinstance(value, (list, tuple)):
+                return default
+            value = next((entry for entry in value if _entry_matches(entry, keys)), _MISSING)
+            if value is _MISSING:
+                return default
+    return value
+
+
+def apply_notification(response: dict, notification: dict) -> dict:
+    """
+    Apply the updates and deletes of a subscription notification to a Get response.
+
+    Updated and deleted paths are set in or removed from the value of the response's update containing them. Updates
+    lying within an updated or deleted path are replaced or removed. Updated paths not contained in any update are
+    added as updates of their normalized path. The response is not modified, changed parts are copied.
+
+    :param response: The Get response as returned by pygnmi, may be None.
+    :param notification: The notification as parsed by pygnmi's telemetryParser.
+    :return: The response with the notification applied.
+    """
+    notifications = [dict(n, update=list(n.get("update") or [])) for n in (response or {}).get("notification") or []]
+    prefix = notification.get("prefix")
+    for update in notification.get("update") or []:
+        _apply_value(notifications, split_path(join_path(prefix, update.get("path"))), update.get("val"))
+    for deleted in notification.get("delete") or []:
+        deleted_path = deleted.get("path") if isinstance(deleted, dict) else deleted
+        _apply_value(notifications, split_path(join_path(prefix, deleted_path)), _MISSING)
+    result = dict(response or {})
+    result["notification"] = notifications
+    return result
+
+
+def _apply_value(notifications: list, elements: tuple, value):
+    """
+    Set the value at the given path elements in the updates of notifications, _MISSING removes it.
+    """
+    contained = False
+    for notification in notifications:
+        updates = []
+        for update in notification["update"]:
+            update_elements = split_path(join_path(notification.get("prefix"), update.get("path")))
+            if path_startswith(elements, update_elements):
+                contained = True
+                update = dict(update, val=_set_value(update.get("val"), elements[len(update_elements):], value))
+            elif path_startswith(update_elements, elements):
+                if value is _MISSING:
+                    continue
+                contained = True
+                update = dict(update, val=lookup_value(value, update_elements[len(elements):], _MISSING))
+            if update.get("val") is not _MISSING:
+                updates.append(update)
+        notification["update"] = updates
+    if not contained and value is not _MISSING:
+        notifications.append({"prefix": None, "update": [{"path": format_path(elements), "val": value}]})
+
+
+def _set_value(value, elements: tuple, new):
+    """
+    Set the subtree at the given path elements in a copy of a JSON value, _MISSING removes it.
+    """
+    if len(elements) == 0:
+        return new
+    (name, keys), rest = elements[0], elements[1:]
+    data = dict(value) if isinstance(value, dict) else dict()
+    key = next((key for key in data if key.rpartition(":")[2] == name), name)
+    child = data.get(key, _MISSING)
+    if keys:
+        entries = list(child) if isinstance(child, (list, tuple)) else []
+        index = next((index for index, entry in enumerate(entries) if _entry_matches(entry, keys)), None)
+        if index is None:
+            if new is _MISSING:
+                return value
+            entries.append(_set_value(dict(keys), rest, new))
+        else:
+            entry = _set_value(entries[index], rest, new)
+            if entry is _MISSING:
+                del entries[index]
+            else:
+                entries[index] = entry
+        data[key] = entries
+    else:
+        if child is _MISSING and new is _MISSING:
+            return value
+        child = _set_value(dict() if child is _MISSING else child, rest, new)
+        if child is _MISSING:
+            data.pop(key, None)
+        else:
+            data[key] = child
+    return data
+
+
+def is_stripped(path: str, prefixes: list) -> bool:
+    """
+    Check if a path lies within one of the stripped prefixes.
+
+    :param path: The gNMI path string.
+    :param prefixes: The stripped prefixes as returned by split_path.
+    :return: Whether the whole path is stripped.
+    """
+    elements = split_path(path)
+    return any(path_startswith(elements, prefix) for prefix in prefixes)
+
+
+def strip_response(response: dict, prefixes: list) -> dict:
+    """
+    Remove the data below stripped prefixes from a Get response.
+
+    Updates within a stripped prefix are dropped. Updates containing a stripped prefix, e.g., a Get of all interfaces
+    while one interface is stripped, have the stripped subtree removed from their value. Notifications that are left
+    without updates and deletes are dropped. The response is not modified, stripped parts are copied.
+
+    :param response: The Get response as returned by pygnmi.
+    :param prefixes: The stripped prefixes as returned by split_path.
+    :return: The stripped response.
+    """
+    if not prefixes or not response or not response.get("notification"):
+        return response
+    notifications = []
+    stripped = False
+    for notification in response["notification"]:
+        updates = []
+        notification_stripped = False
+        for update in notification.get("update") or []:
+            elements = split_path(join_path(notification.get("prefix"), update.get("path")))
+            if any(path_startswith(elements, prefix) for prefix in prefixes):
+                notification_stripped = True
+                continue
+            val = update.get("val")
+            for prefix in prefixes:
+                if len(prefix) > len(elements) and path_startswith(prefix, elements):
+                    val = _strip_value(val, prefix[len(elements):])
+            if val is not update.get("val"):
+                notification_stripped = True
+                update = dict(update)
+                update["val"] = val
+            updates.append(update)
+        if notification_stripped:
+            stripped = True
+            if len(updates) == 0 and not notification.get("delete"):
+                continue
+            notification = dict(notification)
+            notification["update"] = updates
+        notifications.append(notification)
+    if not stripped:
+        return response
+    response = dict(response)
+    response["notification"] = notifications
+    return response
+
+
+def _strip_value(value, elements: tuple):
+    """
+    Remove the subtree at the given path elements from a JSON value, returning a copy if something was removed.
+    """
+    if not isinstance(value, dict) or len(elements) == 0:
+        return value
+    (name, keys), rest = elements[0], elements[1:]
+    result = value
+    for key, child in value.items():
+        if name != "*" and key.rpartition(":")[2] != name:
+            continue
+        if len(keys) == 0:
+            new_child = None if len(rest) == 0 else _strip_value(child, rest)
+        elif isinstance(child, list):
+            entries = []
+            for entry in child:
+                if _entry_matches(entry, keys):
+                    if len(rest) == 0:
+                        continue
+                    entry = _strip_value(entry, rest)
+                entries.append(entry)
+            new_child = child if len(entries) == len(child) and all(
+                new is old for new, old in zip(entries, child)
+            ) else entries
+        else:
+            continue
+        if new_child is not child:
+            if result is value:
+                result = dict(value)
+            if new_child is None:
+                del result[key]
+            else:
+                result[key] = new_child
+    return result
+
+
+def _entry_matches(entry, keys: tuple) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    entry_keys = {key.rpartition(":")[2]: value for key, value in entry.items()}
+    for key, value in keys:
+        if key not in entry_keys or (value != "*" and _key_string(entry_keys[key]) != value):
+            return False
+    return True
+
+
+def _key_string(value) -> str:
+    # gNMI paths use the JSON representation of boolean keys
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
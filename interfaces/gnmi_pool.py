@@ -0,0 +1,213 @@
+"""Pool of persistent gNMI sessions, keyed by target host"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import grpc
+from pygnmi.client import gNMIclient
+
+from config import ConnectionPoolSettings
+
+
+class _PooledSession:
+    """
+    A pooled gNMI session to a single host and its connection state.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.client = None
+        self.lock = threading.Lock()
+        self.users = 0
+        self.last_used = 0.0
+        self.last_checked = 0.0
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class GnmiConnectionPool:
+    """
+    Per-process pool of gNMI sessions.
+
+    Every host gets a single long-lived gNMIclient whose gRPC channel and capabilities exchange is reused by all
+    interface instances of the process. Sessions idle for longer than the health check interval are probed with a
+    Capabilities request before they are handed out again, broken sessions are reconnected with exponential backoff
+    and sessions unused for longer than the idle timeout are closed.
+
+    Attributes:
+        settings (ConnectionPoolSettings): health check, backoff and idle eviction settings
+    """
+
+    def __init__(self, settings: ConnectionPoolSettings, logger):
+        self.settings = settings
+        self.logger = logger
+        self.pid = os.getpid()
+        self.sessions = dict[str, _PooledSession]()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def session(self, host: str, port: int, username: str, password: str):
+        """
+        Borrow the pooled gNMI session for a host, connecting it if necessary.
+
+        The session is not exclusive, gRPC channels can be shared between threads. Sessions are not evicted while
+        they are borrowed, e.g., by a long-lived subscription. If the body raises a connection error, the session is
+        discarded and will be reconnected on the next use. Other errors, e.g., a Get of an invalid path, keep it.
+
+        :param host: The hostname of the target.
+        :param port: The gNMI port of the target.
+        :param username: The username for the target.
+        :param password: The password for the target.
+        :return: A connected gNMIclient.
+        """
+        self.evict_idle()
+        pooled = self._get_pooled_session(host)
+        client = self._connect(pooled, port, username, password)
+        try:
+            yield client
+        except Exception as e:
+            if is_connection_error(e):
+                self.discard(host, client)
+            raise
+        finally:
+            with pooled.lock:
+                pooled.users -= 1
+                pooled.last_used = time.monotonic()
+
+    def discard(self, host: str, client: gNMIclient = None):
+        """
+        Close the session for a host, e.g., after an RPC error.
+
+        :param host: The hostname of the target.
+        :param client: Only discard the session if it still uses this client.
+        """
+        pooled = self.sessions.get(host)
+        if pooled is not None:
+            with pooled.lock:
+                if client is None or pooled.client is client:
+                    self._close(pooled)
+
+    def evict_idle(self):
+        """
+        Close all sessions that were not used within the idle timeout.
+        """
+        now = time.monotonic()
+        for pooled in list(self.sessions.values()):
+            if (
+                pooled.client is not None
+                and pooled.users == 0
+                and now - pooled.last_used > self.settings.idle_timeout
+                and pooled.lock.acquire(blocking=False)
+            ):
+                try:
+                    self.logger.debug(f"Closing idle gNMI session to {pooled.host}...")
+                    self._close(pooled)
+                finally:
+                    pooled.lock.release()
+
+    def close(self):
+        """
+        Close all sessions of the pool.
+        """
+        for pooled in list(self.sessions.values()):
+            with pooled.lock:
+                self._close(pooled)
+
+    def _get_pooled_session(self, host: str) -> _PooledSession:
+        pooled = self.sessions.get(host)
+        if pooled is None:
+            with self.lock:
+                pooled = self.sessions.setdefault(host, _PooledSession(host))
+        return pooled
+
+    def _connect(self, pooled: _PooledSession, port: int, username: str, password: str) -> gNMIclient:
+        with pooled.lock:
+            now = time.monotonic()
+            if pooled.client is not None and now - pooled.last_checked > self.settings.health_check_interval:
+                try:
+                    if pooled.client.capabilities() is None:
+                        raise ConnectionError("no Capabilities response")
+                    pooled.last_checked = now
+                except Exception as e:
+                    self.logger.warning(f"gNMI session to {pooled.host} failed health check, reconnecting: {str(e)}")
+                    self._close(pooled)
+
+            if pooled.client is None:
+                if now < pooled.retry_at:
+                    raise ConnectionError(
+                        f"gNMI session to {pooled.host} is backing off for {round(pooled.retry_at - now, 2)}s "
+                        f"after {pooled.failures} failed connection attempts"
+                    )
+                client = gNMIclient(
+                    target=(pooled.host, port),
+                    username=username,
+                    password=password,
+                    insecure=True,
+                    gnmi_timeout=self.settings.connect_timeout,
+                )
+                try:
+                    client.connect()
+                except Exception:
+                    pooled.client = client
+                    self._close(pooled)
+                    pooled.failures += 1
+                    pooled.retry_at = now + min(
+                        self.settings.backoff_max,
+                        self.settings.backoff_initial * 2 ** (pooled.failures - 1),
+                    )
+                    raise
+                self.logger.debug(f"Opened gNMI session to {pooled.host}")
+                pooled.client = client
+                pooled.failures = 0
+                pooled.retry_at = 0.0
+                pooled.last_checked = now
+
+            pooled.users += 1
+            pooled.last_used = now
+            return pooled.client
+
+    def _close(self, pooled: _PooledSession):
+        if pooled.client is not None:
+            try:
+                pooled.client.close()
+            except Exception as e:
+                self.logger.debug(f"Error while closing gNMI session to {pooled.host}: {str(e)}")
+            pooled.client = None
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """
+    Check if an error, or the gRPC error wrapped by pygnmi, means the connection to the target is broken.
+
+    :param error: The raised error.
+    :return: Whether the error is a connection error or a gRPC UNAVAILABLE status.
+    """
+    while error is not None:
+        if isinstance(error, ConnectionError):
+            return True
+        if isinstance(error, grpc.RpcError) and callable(getattr(error, "code", None)):
+            return error.code() == grpc.StatusCode.UNAVAILABLE
+        error = getattr(error, "orig_exc", None) or error.__cause__
+    return False
+
+
+_pool: GnmiConnectionPool = None
+
+
+def get_pool(settings: ConnectionPoolSettings, logger) -> GnmiConnectionPool:
+    """
+    Get the gNMI connection pool of the current process.
+
+    gRPC channels must not be shared with forked controller processes, so a new pool is created whenever the pool
+    was inherited from the parent process.
+
+    :param settings: The connection pool settings.
+    :param logger: The logger to use.
+    :return: The connection pool of the current process.
+    """
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        _pool = GnmiConnectionPool(settings, logger)
+    return _pool
@@ -0,0 +1,111 @@
+"""Routing of gNMI notifications to the channels of the siblings interested in them"""
+
+import threading
+
+from config import SiblingSettings
+from interfaces.gnmi_path import split_path, path_startswith, is_stripped
+
+REALNET_CHANNEL = "realnet"
+
+
+class _SiblingRoute:
+    """
+    Nodes and paths a sibling syncs using its gNMI interface.
+    """
+
+    def __init__(self, settings: SiblingSettings, nodes):
+        gnmi_settings = settings.interfaces.get("gnmi")
+        self.synced = gnmi_settings is not None
+        if self.synced:
+            self.nodes_regex = gnmi_settings.nodes_regex
+            self.paths = [split_path(path.path) for path in gnmi_settings.paths]
+            self.strip_prefixes = [split_path(prefix) for prefix in gnmi_settings.strip]
+        # names of the nodes in the sibling's topology, None if the topology was not built yet
+        self.nodes = set(nodes) if nodes is not None else None
+
+    def wants(self, node: str, path: str) -> bool:
+        if not self.synced:
+            return False
+        if self.nodes is not None and node not in self.nodes:
+            return False
+        if not self.nodes_regex.fullmatch(node):
+            return False
+        if is_stripped(path, self.strip_prefixes):
+            return False
+        elements = split_path(path)
+        # the notification is of interest if it contains a watched path or lies within one
+        return any(
+            path_startswith(elements, watched) or path_startswith(watched, elements) for watched in self.paths
+        )
+
+
+class RoutingTable:
+    """
+    Routing table mapping the (node, path) of a gNMI notification to the channels interested in it.
+
+    A sibling channel is interested if the node is part of the sibling's topology and matches the nodes regex of the
+    sibling's gNMI interface and if the path overlaps with one of its paths and is not stripped. The realnet channel
+    is only interested if realnet apps are configured. Channels unknown to the table (e.g., added at runtime) receive
+    all notifications. The routes of a (node, path) are resolved once and cached until the table is rebuilt, e.g.,
+    after the topology of a sibling changed.
+
+    Attributes:
+        siblings_config (dict): the settings of all siblings
+        realnet_apps (bool): whether apps run for the realnet and need its notifications
+        routes (dict): the route of every sibling
+        cache (dict): the resolved channels of every (node, path)
+    """
+
+    def __init__(self, siblings_config: dict[str, SiblingSettings], realnet_apps: bool):
+        self.siblings_config = siblings_config
+        self.realnet_apps = realnet_apps
+        self.routes = dict()
+        self.channels_key = None
+        self.cache = dict()
+        self.lock = threading.Lock()
+        self.rebuild()
+
+    def rebuild(self, siblings: dict = None):
+        """
+        Rebuild the routes from the sibling settings and the current topologies of the siblings.
+
+        :param siblings: The state of the siblings as maintained by the main loop, the nodes of a sibling are only
+            considered after its topology was built.
+        """
+        routes = dict()
+        for sibling, settings in self.siblings_config.items():
+            nodes = (siblings or {}).get(sibling, {}).get("nodes")
+            routes[sibling] = _SiblingRoute(settings, nodes)
+        with self.lock:
+            self.routes = routes
+            self.cache = dict()
+
+    def channels(self, channels: list, node: str, path: str) -> list:
+        """
+        Get the channels interested in a gNMI notification.
+
+        :param channels: The channels of the event broker.
+        :param node: The name of the node the notification is about.
+        :param path: The polled path of the notification.
+        :return: The interested channels.
+        """
+        with self.lock:
+            channels_key = tuple(channels)
+            if channels_key != self.channels_key:
+                # channels were added to the broker, resolve the routes again
+                self.channels_key = channels_key
+                self.cache = dict()
+            routed = self.cache.get((node, path))
+            if routed is None:
+                routed = self.cache[(node, path)] = [
+                    channel for channel in channels if self._wants(channel, node, path)
+                ]
+            return routed
+
+    def _wants(self, channel: str, node: str, path: str) -> bool:
+        if channel == REALNET_CHANNEL:
+            return self.realnet_apps
+        route = self.routes.get(channel)
+        if route is None:
+            return True
+        return route.wants(node, path)
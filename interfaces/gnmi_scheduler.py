@@ -0,0 +1,121 @@
+"""Per-path poll scheduling with adaptive intervals"""
+
+import time
+import random
+import threading
+
+from config import PathSettings
+
+# number of consecutive unchanged polls after which the interval of a path is increased
+BACKOFF_AFTER = 3
+# factor the interval of an unchanged path is multiplied with on every backoff
+BACKOFF_FACTOR = 2
+
+
+class _PathState:
+    """
+    Schedule of a path on a single node.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_poll = 0
+        self.unchanged = 0
+
+
+class PollScheduler:
+    """
+    Scheduler deciding which paths of a node are due for polling.
+
+    Paths without an interval are polled every sync interval (base_interval). Paths with an interval (or a
+    max_interval, which starts at the sync interval) are polled when their interval elapsed. Every path has its own
+    due time, so a path with a short interval does not cause the other paths to be polled at its rate. After
+    BACKOFF_AFTER unchanged polls, the interval of a path is multiplied by BACKOFF_FACTOR up to its max_interval. A
+    change resets the interval to the configured one. Every poll is randomly shifted by a fraction (jitter) of the
+    interval, so polls of many nodes spread out over time instead of hitting all nodes at once.
+
+    Attributes:
+        paths (list): the path settings, highest priority first
+        base_interval (float): interval of paths without an interval, the sync interval
+        jitter (float): fraction of the interval polls are shifted by
+        states (dict): schedule of every (node, path)
+    """
+
+    def __init__(self, paths: list[PathSettings], base_interval: float, jitter: float):
+        self.paths = sorted(paths, key=lambda path: -path.priority)
+        self.base_interval = base_interval
+        self.jitter = jitter
+        self.states = dict()
+        self.lock = threading.Lock()
+
+    def _initial_interval(self, path: PathSettings):
+        if path.interval is not None:
+            return path.interval
+        if path.max_interval is not None:
+            return min(self.base_interval, path.max_interval)
+        return self.base_interval
+
+    def due(self, node: str, now: float = None) -> list[PathSettings]:
+        """
+        Get the paths of a node that are due for polling.
+
+        :param node: The name of the node.
+        :param now: The current monotonic time, defaults to time.monotonic().
+        :return: The due paths, highest priority first.
+        """
+        now = time.monotonic() if now is None else now
+        due_paths = []
+        with self.lock:
+            for path in self.paths:
+                state = self.states.get((node, path.path))
+                if state is None:
+                    state = self.states[(node, path.path)] = _PathState(self._initial_interval(path))
+                if state.next_poll <= now:
+                    due_paths.append(path)
+        return due_paths
+
+    def record(self, node: str, path: PathSettings, changed: bool, now: float = None):
+        """
+        Schedule the next poll of a path after it was polled.
+
+        :param node: The name of the node.
+        :param path: The settings of the polled path.
+        :param changed: Whether the data of the path changed since the last poll.
+        :param now: The current monotonic time, defaults to time.monotonic().
+        """
+        interval = self._initial_interval(path)
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            state = self.states.setdefault((node, path.path), _PathState(interval))
+            if changed:
+                state.interval = interval
+                state.unchanged = 0
+            else:
+                state.unchanged += 1
+                if path.max_interval is not None and state.unchanged >= BACKOFF_AFTER:
+                    state.interval = min(state.interval * BACKOFF_FACTOR, max(path.max_interval, interval))
+                    state.unchanged = 0
+            state.next_poll = now + state.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def retain(self, nodes):
+        """
+        Drop the schedules of nodes that are no longer polled.
+
+        :param nodes: The names of the polled nodes.
+        """
+        with self.lock:
+            for key in [key for key in self.states if key[0] not in nodes]:
+                del self.states[key]
+
+    def next_poll_delay(self, now: float = None):
+        """
+        Get the time until the next scheduled path is due.
+
+        :param now: The current monotonic time, defaults to time.monotonic().
+        :return: The delay in seconds or None if no path was scheduled yet.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if len(self.states) == 0:
+                return None
+            return max(0, min(state.next_poll for state in self.states.values()) - now)
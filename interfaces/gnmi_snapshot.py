@@ -0,0 +1,84 @@
+"""Immutable snapshots of gNMI JSON trees with structural sharing"""
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for snapshot subtrees. It is still a dict, so it can be serialized and read like the
+    original data, but it can be shared between snapshots instead of being copied.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("gNMI snapshots are immutable")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(tuple):
+    """
+    Read-only list used for snapshot subtrees, serialized like a list.
+    """
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(data, previous=None):
+    """
+    Turn a gNMI JSON tree into an immutable snapshot.
+
+    Subtrees that are equal to the corresponding subtree of the previous snapshot are not copied, the previous
+    subtree is reused instead. Unchanged parts of consecutive snapshots are therefore stored only once and are
+    identical objects, which lets the diff engine skip them without comparing them.
+
+    :param data: The tree to freeze, e.g., a Get response.
+    :param previous: The previous snapshot of the same tree, if any.
+    :return: The snapshot.
+    """
+    if isinstance(data, dict):
+        if isinstance(data, FrozenDict) and previous is None:
+            return data
+        if not isinstance(previous, FrozenDict):
+            previous = None
+        shared = previous is not None and len(previous) == len(data)
+        items = dict()
+        for key, value in data.items():
+            previous_value = previous.get(key) if previous is not None else None
+            items[key] = frozen = freeze(value, previous_value)
+            if shared and (frozen is not previous_value or key not in previous):
+                shared = False
+        return previous if shared else FrozenDict(items)
+    if isinstance(data, (list, tuple)):
+        if isinstance(data, FrozenList) and previous is None:
+            return data
+        if not isinstance(previous, FrozenList):
+            previous = None
+        shared = previous is not None and len(previous) == len(data)
+        entries = []
+        for index, value in enumerate(data):
+            previous_value = previous[index] if previous is not None and index < len(previous) else None
+            entries.append(freeze(value, previous_value))
+            if shared and entries[-1] is not previous_value:
+                shared = False
+        return previous if shared else FrozenList(entries)
+    if previous is not None and type(previous) is type(data) and previous == data:
+        return previous
+    return data
@@ -0,0 +1,183 @@
+"""Write actor serializing gNMI writes per host across all DigSiNet processes"""
+
+import threading
+from multiprocessing import Process, Queue
+
+from config import InterfaceCredentials
+from interfaces.gnmi_pool import get_pool, is_connection_error
+from interfaces.gnmi_path import split_path
+
+
+class _HostWriteQueue:
+    """
+    Pending writes to a single host and the thread applying them.
+
+    Writes are keyed by path. A write to a path that is already queued replaces the queued one (last writer wins),
+    so while a SetRequest is in flight, bursts of writes to the same path are merged into a single operation.
+    """
+
+    def __init__(self, writer: "GnmiWriter", host: str):
+        self.writer = writer
+        self.host = host
+        self.pending = dict()
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=f"gNMI writer {host}", daemon=True)
+        self.thread.start()
+
+    def merge(self, operations: list):
+        with self.condition:
+            for operation in operations:
+                path = operation[1]
+                if path in self.pending:
+                    self.writer.logger.debug(f"Coalescing queued gNMI write of {path} on {self.host}")
+                    # move the path to the end, so writes are applied in the order of their latest change
+                    del self.pending[path]
+                self.pending[path] = operation
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while len(self.pending) == 0:
+                    self.condition.wait()
+                operations = list(self.pending.values())
+                self.pending = dict()
+            try:
+                with self.writer.pool.session(
+                    self.host,
+                    self.writer.credentials.port,
+                    self.writer.credentials.username,
+                    self.writer.credentials.password,
+                ) as gc:
+                    set_operations(gc, self.host, operations, self.writer.logger)
+            except Exception as e:
+                self.writer.logger.error(f"Error writing gNMI data to {self.host}: {str(e)}")
+
+
+class GnmiWriter:
+    """
+    Write actor for gNMI targets.
+
+    The actor runs in its own process. Processes forked after it was started (e.g., the controllers) share its request
+    queue, so all writes to a host are serialized by the host's write queue in the actor, no matter which process
+    submitted them. Submitting a write does not block for the duration of the RPC.
+
+    Attributes:
+        credentials (InterfaceCredentials): credentials of the gNMI interface
+        requests (Queue): queue of (host, operations) write requests
+        process (Process): the actor process
+    """
+
+    def __init__(self, credentials: InterfaceCredentials, logger):
+        self.credentials = credentials
+        self.logger = logger
+        self.requests = Queue()
+        self.pool = None
+        self.process = Process(target=self._run, name="gNMI writer", daemon=True)
+        self.process.start()
+        self.logger.info(f"gNMI writer has Process id: {str(self.process.pid)}")
+
+    def submit(self, host: str, operations: list):
+        """
+        Queue operations to be written to a host.
+
+        :param host: The hostname of the node.
+        :param operations: List of (op, path, value) tuples, value is None for delete operations.
+        """
+        self.requests.put((host, operations))
+
+    def _run(self):
+        self.pool = get_pool(self.credentials.connection_pool, self.logger)
+        host_queues = dict()
+        while True:
+            host, operations = self.requests.get()
+            if host not in host_queues:
+                host_queues[host] = _HostWriteQueue(self, host)
+            host_queues[host].merge(operations)
+
+
+def set_operations(gc, host: str, operations: list, logger) -> list:
+    """
+    Apply replace, update and delete operations to a node using a single SetRequest. If the node rejects the
+    combined transaction, the operations are applied one by one.
+
+    :param gc: The gNMI client of the node.
+    :param host: The hostname of the node.
+    :param operations: List of (op, path, value) tuples, value is None for delete operations.
+    :param logger: The logger to report the results of the operations to.
+    :return: List of (op, path, result) tuples, result is the exception if the operation failed.
+    """
+    try:
+        response = gc.set(**_build_set_request(operations))
+        results = _match_results(operations, response)
+    except Exception as e:
+        # a broken connection is reported to the pool instead of trying the operations one by one
+        if len(operations) == 1 or is_connection_error(e):
+            raise
+        logger.warning(
+            f"Combined gNMI set of {len(operations)} operations rejected by {host}, "
+            f"falling back to single operations: {str(e)}"
+        )
+        results = []
+        for operation in operations:
+            op, path, _ = operation
+            try:
+                results.append((op, path, gc.set(**_build_set_request([operation]))))
+            except Exception as op_error:
+                if is_connection_error(op_error):
+                    raise
+                results.append((op, path, op_error))
+
+    for op, path, result in results:
+        if isinstance(result, Exception):
+            logger.error(f"gNMI {op} of {path} on {host} failed: {str(result)}")
+        else:
+            logger.debug(f"gNMI {op} of {path} on {host} result: {str(result)}")
+    return results
+
+
+def _match_results(operations: list, response) -> list:
+    """
+    Match the update results of a SetResponse to the operations by their op and path. The results are not in the
+    order of the operations, the SetRequest groups them by op. Operations without a matching result get the whole
+    response.
+    """
+    entries = dict()
+    for entry in response.get("response") or [] if isinstance(response, dict) else []:
+        key = (str(entry.get("op", "")).lower(), split_path(entry.get("path") or ""))
+        entries.setdefault(key, []).append(entry)
+    results = []
+    for op, path, _ in operations:
+        matching = entries.get((op, split_path(path)))
+        results.append((op, path, matching.pop(0) if matching else response))
+    return results
+
+
+def _build_set_request(operations: list) -> dict:
+    request = {"delete": [], "replace": [], "update": []}
+    for op, path, value in operations:
+        if op == "delete":
+            request["delete"].append(path)
+        else:
+            request[op].append((path, value))
+    return request
+
+
+_writer: GnmiWriter = None
+
+
+def get_writer(credentials: InterfaceCredentials, logger) -> GnmiWriter:
+    """
+    Get the gNMI write actor, starting it if necessary.
+
+    The actor is inherited by processes forked after it was started, so the first gNMI interface created in the main
+    process (the realnet's) starts the actor shared by all controllers.
+
+    :param credentials: The credentials of the gNMI interface.
+    :param logger: The logger to use.
+    :return: The write actor.
+    """
+    global _writer
+    if _writer is None:
+        _writer = GnmiWriter(credentials, logger)
+    return _writer
@@ -44,6 +44,28 @@ class Interface(ABC):
     def setNodeUpdate(self, nodes: dict, node_name: str, path: str, notification_data: dict):
         pass
 
+    @abstractmethod
+    def setNodePatch(self, nodes: dict, node_name: str, patch: list):
+        pass
+
     @abstractmethod
     def set(self, nodes: dict, node_name: str, op: str, data: dict):
         pass
+
+    def get_next_poll_delay(self):
+        '''
+        Time in seconds until the interface wants to be polled again, None if the sync interval is sufficient
+        '''
+        return None
+
+    def topology_changed(self, siblings: dict):
+        '''
+        Notify the interface that the topology of a sibling was built or changed
+        '''
+        pass
+
+    def close(self):
+        '''
+        Release resources held by the interface, e.g., open sessions and subscriptions
+        '''
+        pass
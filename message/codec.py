@@ -0,0 +1,102 @@
+"""Wire codec for broker messages"""
+
+import json
+import zlib
+
+from config.codec import CodecSettings, Encoding, Compression
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# every encoded message starts with the magic bytes, followed by the envelope version, encoding and compression
+MAGIC = b"DSN"
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+ENCODING_IDS = {Encoding.JSON: 1, Encoding.MSGPACK: 2}
+COMPRESSION_IDS = {Compression.NONE: 0, Compression.ZLIB: 1}
+
+
+class CodecError(Exception):
+    """
+    Raised if a message can not be encoded or decoded.
+    """
+
+
+class Codec:
+    """
+    Codec encoding broker messages into a versioned envelope and decoding them.
+
+    The envelope records the encoding and compression of the message, so messages are decoded correctly regardless
+    of the codec settings of the publishing process. Messages without an envelope are decoded as plain JSON, as
+    published by earlier versions of DigSiNet. Data that can not be serialized raises a CodecError instead of being
+    replaced.
+
+    Attributes:
+        settings (CodecSettings): encoding and compression of published messages
+    """
+
+    def __init__(self, settings: CodecSettings = None):
+        self.settings = settings if settings is not None else CodecSettings()
+        if self.settings.encoding == Encoding.MSGPACK and msgpack is None:
+            raise CodecError("msgpack encoding requires the msgpack package")
+        self.header = MAGIC + bytes([VERSION, ENCODING_IDS[self.settings.encoding]])
+
+    def encode(self, data) -> bytes:
+        """
+        Encode a message.
+
+        :param data: The message, consisting of dicts, lists, tuples, strings, numbers, booleans and None.
+        :return: The encoded message including its envelope.
+        """
+        try:
+            if self.settings.encoding == Encoding.MSGPACK:
+                payload = msgpack.packb(data, use_bin_type=True, default=_unserializable)
+            else:
+                payload = json.dumps(
+                    data, separators=(",", ":"), ensure_ascii=False, default=_unserializable
+                ).encode("utf-8")
+        except CodecError:
+            raise
+        except (TypeError, ValueError, OverflowError) as e:
+            raise CodecError(f"Message can not be encoded: {e}")
+        compression = Compression.NONE
+        if self.settings.compression == Compression.ZLIB and len(payload) >= self.settings.compression_threshold:
+            payload = zlib.compress(payload)
+            compression = Compression.ZLIB
+        return self.header + bytes([COMPRESSION_IDS[compression]]) + payload
+
+    def decode(self, message):
+        """
+        Decode a message.
+
+        :param message: The encoded message.
+        :return: The decoded message.
+        """
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        if not message.startswith(MAGIC):
+            return json.loads(message)
+        if len(message) < HEADER_SIZE:
+            raise CodecError("Message envelope is truncated")
+        version, encoding_id, compression_id = message[len(MAGIC):HEADER_SIZE]
+        if version > VERSION:
+            raise CodecError(f"Unsupported message envelope version {version}")
+        payload = message[HEADER_SIZE:]
+        if compression_id == COMPRESSION_IDS[Compression.ZLIB]:
+            payload = zlib.decompress(payload)
+        elif compression_id != COMPRESSION_IDS[Compression.NONE]:
+            raise CodecError(f"Unsupported message compression {compression_id}")
+        if encoding_id == ENCODING_IDS[Encoding.MSGPACK]:
+            if msgpack is None:
+                raise CodecError("Decoding msgpack messages requires the msgpack package")
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if encoding_id == ENCODING_IDS[Encoding.JSON]:
+            return json.loads(payload)
+        raise CodecError(f"Unsupported message encoding {encoding_id}")
+
+
+def _unserializable(obj):
+    raise CodecError(f"Object of type {type(obj).__name__} can not be serialized")
@@ -1,14 +1,16 @@
 from message.message import Message
+from message.codec import Codec
 
 
 class KafkaMessage(Message):
-    def __init__(self, message):
+    def __init__(self, message, codec: Codec):
         self.kafka_message = message
+        self.codec = codec
 
     def error(self):
-        if self.kafka_message:
+        if self.kafka_message is None:
             return None
         return self.kafka_message.error()
 
     def value(self):
-        return self.kafka_message.value().decode("utf-8")
+        return self.codec.decode(self.kafka_message.value())
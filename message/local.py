@@ -0,0 +1,15 @@
+from message.message import Message
+from message.codec import Codec
+
+
+class LocalMessage(Message):
+    def __init__(self, message, codec: Codec):
+        super().__init__(message)
+        self.message = message
+        self.codec = codec
+
+    def error(self):
+        return None
+
+    def value(self):
+        return self.codec.decode(self.message)
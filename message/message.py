@@ -10,4 +10,7 @@ class Message(ABC):
 
     @abstractmethod
     def value(self):
+        """
+        Get the decoded content of the message.
+        """
         pass
@@ -1,13 +1,15 @@
 from message.message import Message
+from message.codec import Codec
 
 
 class RabbitMessage(Message):
-    def __init__(self, message):
+    def __init__(self, message, codec: Codec):
         super().__init__(message)
         self.message = message
+        self.codec = codec
 
     def error(self):
         pass
 
     def value(self):
-        return self.message
+        return self.codec.decode(self.message)
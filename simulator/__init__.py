@@ -0,0 +1,3 @@
+from .gnmi import GnmiSimulator, SimulatedNode, default_tree
+
+__all__ = ["GnmiSimulator", "SimulatedNode", "default_tree"]
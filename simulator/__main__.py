@@ -0,0 +1,78 @@
+"""
+Run simulated gNMI targets, e.g.:
+
+    python -m simulator --nodes 1000 --hostname "clab-digsinet-ceos{index}" --latency 0.005 --change-rate 0.1 \
+        --hosts-file hosts.yml
+
+and add the written hosts mapping to the gNMI interface credentials of the DigSiNet config.
+"""
+
+import argparse
+import json
+import logging
+import signal
+import threading
+
+import yaml
+
+from simulator.gnmi import GnmiSimulator, default_tree, BASE_ADDRESS
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="simulator", description="Simulate gNMI targets for DigSiNet")
+    parser.add_argument('--nodes', help='Number of simulated nodes', type=int, default=2)
+    parser.add_argument('--hostname', help='Hostname of the nodes, {index} is replaced by the node number',
+                        default='clab-digsinet-ceos{index}')
+    parser.add_argument('--port', help='gNMI port of the nodes', type=int, default=6030)
+    parser.add_argument('--tree', help='JSON file with the data tree of every node, defaults to OpenConfig '
+                                       'interfaces')
+    parser.add_argument('--interfaces', help='Number of Ethernet interfaces in the default tree', type=int, default=4)
+    parser.add_argument('--latency', help='Delay of every RPC in seconds', type=float, default=0)
+    parser.add_argument('--latency-jitter', help='Maximum random delay added to the latency in seconds', type=float,
+                        default=0)
+    parser.add_argument('--change-rate', help='Random changes per node and second', type=float, default=0)
+    parser.add_argument('--workers', help='Threads serving the RPCs of every node', type=int, default=64)
+    parser.add_argument('--base-address', help='Loopback address of the first node', default=BASE_ADDRESS)
+    parser.add_argument('--hosts-file', help='Write the hosts mapping of the nodes to this YAML file')
+    parser.add_argument('--debug', help='Enable debug logging', action='store_true')
+    args = parser.parse_args()
+
+    logger = logging.getLogger(__name__)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    if args.tree:
+        with open(args.tree) as file:
+            tree = json.load(file)
+    else:
+        tree = default_tree(args.interfaces)
+    hostnames = [args.hostname.format(index=index) for index in range(1, args.nodes + 1)]
+    simulator = GnmiSimulator(
+        hostnames,
+        args.port,
+        tree=tree,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        change_rate=args.change_rate,
+        max_workers=args.workers,
+        base_address=args.base_address,
+        logger=logger,
+    )
+    simulator.start()
+
+    hosts = yaml.safe_dump({"hosts": simulator.hosts()}, default_flow_style=False)
+    if args.hosts_file:
+        with open(args.hosts_file, "w") as file:
+            file.write(hosts)
+        logger.info(f"Wrote hosts mapping of the simulated nodes to {args.hosts_file}")
+    else:
+        print(hosts)
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGINT, lambda sig, frame: stopped.set())
+    signal.signal(signal.SIGTERM, lambda sig, frame: stopped.set())
+    stopped.wait()
+    simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""Simulated gNMI targets for offline testing of the gNMI interface"""
+
+import copy
+import json
+import time
+import queue
+import random
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+from pygnmi.spec.v080 import gnmi_pb2, gnmi_pb2_grpc
+
+# version of the gNMI service reported by the simulated targets
+GNMI_VERSION = "0.8.0"
+# first address of the simulated targets, every target gets its own loopback address
+BASE_ADDRESS = "127.1.0.1"
+
+
+def default_tree(interfaces: int = 4) -> dict:
+    """
+    Create an OpenConfig tree resembling the interfaces of a cEOS node.
+
+    :param interfaces: The number of Ethernet interfaces.
+    :return: The tree in JSON IETF encoding.
+    """
+    interface_list = []
+    for name in ["Management0"] + [f"Ethernet{index}" for index in range(1, interfaces + 1)]:
+        interface_list.append(
+            {
+                "name": name,
+                "config": {"name": name, "description": "", "enabled": True, "mtu": 1500},
+                "state": {
+                    "name": name,
+                    "oper-status": "UP",
+                    "counters": {"in-octets": 0, "out-octets": 0},
+                },
+            }
+        )
+    return {"openconfig-interfaces:interfaces": {"interface": interface_list}}
+
+
+def _elements(path: gnmi_pb2.Path, prefix: gnmi_pb2.Path = None) -> tuple:
+    elements = []
+    for element in list(prefix.elem if prefix is not None else []) + list(path.elem):
+        elements.append((element.name.rpartition(":")[2], tuple(sorted(element.key.items()))))
+    return tuple(elements)
+
+
+def _child_key(data: dict, name: str):
+    for key in data:
+        if key.rpartition(":")[2] == name:
+            return key
+    return None
+
+
+def _entry_matches(entry, keys: tuple) -> bool:
+    return isinstance(entry, dict) and all(str(entry.get(key)) == value for key, value in keys)
+
+
+def _resolve(data, elements: tuple):
+    """
+    Get the subtree at the given path elements, None if it does not exist.
+    """
+    for name, keys in elements:
+        if not isinstance(data, dict):
+            return None
+        key = _child_key(data, name)
+        if key is None:
+            return None
+        data = data[key]
+        if keys:
+            if not isinstance(data, list):
+                return None
+            data = next((entry for entry in data if _entry_matches(entry, keys)), None)
+            if data is None:
+                return None
+    return data
+
+
+def _parent(data: dict, elements: tuple, create: bool):
+    """
+    Get the container holding the last path element and the key of the element in it. List entries along the way
+    (and containers, if create is set) are created if they are missing.
+    """
+    for index, (name, keys) in enumerate(elements):
+        last = index == len(elements) - 1
+        key = _child_key(data, name)
+        if key is None:
+            if not create:
+                return None, None
+            key = name
+            data[key] = [] if keys else dict()
+        if not keys:
+            if last:
+                return data, key
+            if not isinstance(data[key], dict):
+                data[key] = dict()
+            data = data[key]
+            continue
+        entries = data[key]
+        entry = next((entry for entry in entries if _entry_matches(entry, keys)), None)
+        if entry is None:
+            if not create:
+                return None, None
+            entry = {key_name: value for key_name, value in keys}
+            entries.append(entry)
+        if last:
+            return entries, entries.index(entry)
+        data = entry
+    return None, None
+
+
+def _merge(target, value):
+    if isinstance(target, dict) and isinstance(value, dict):
+        for key, child in value.items():
+            existing = _child_key(target, key.rpartition(":")[2])
+            if existing is not None and isinstance(target[existing], (dict, list)):
+                target[existing] = _merge(target[existing], child)
+            else:
+                target[existing or key] = copy.deepcopy(child)
+        return target
+    if isinstance(target, list) and isinstance(value, list):
+        for entry in value:
+            match = None
+            if isinstance(entry, dict) and "name" in entry:
+                keys = (("name", str(entry["name"])),)
+                match = next((existing for existing in target if _entry_matches(existing, keys)), None)
+            if match is None:
+                target.append(copy.deepcopy(entry))
+            else:
+                _merge(match, entry)
+        return target
+    return copy.deepcopy(value)
+
+
+def _decode(value: gnmi_pb2.TypedValue):
+    field = value.WhichOneof("value")
+    if field in ("json_ietf_val", "json_val"):
+        return json.loads(getattr(value, field))
+    return getattr(value, field) if field is not None else None
+
+
+def _encode(data) -> gnmi_pb2.TypedValue:
+    return gnmi_pb2.TypedValue(json_ietf_val=json.dumps(data).encode("utf-8"))
+
+
+class SimulatedNode:
+    """
+    State of a simulated target.
+
+    Attributes:
+        name (str): hostname of the node
+        address (str): address the node's gNMI server listens on
+        tree (dict): the node's data tree in JSON IETF encoding
+        subscribers (list): queues of the node's active stream subscriptions
+    """
+
+    def __init__(self, name: str, address: str, tree: dict):
+        self.name = name
+        self.address = address
+        self.tree = tree
+        self.lock = threading.Lock()
+        self.subscribers = []
+
+    def get(self, elements: tuple):
+        with self.lock:
+            return copy.deepcopy(_resolve(self.tree, elements))
+
+    def set(self, op: str, elements: tuple, value=None):
+        with self.lock:
+            if len(elements) == 0:
+                if op == "replace":
+                    self.tree = copy.deepcopy(value)
+                elif op == "update":
+                    self.tree = _merge(self.tree, value)
+                else:
+                    self.tree = dict()
+            else:
+                parent, key = _parent(self.tree, elements, create=op != "delete")
+                if parent is None:
+                    if op != "delete":
+                        raise ValueError(f"invalid path {elements}")
+                elif op == "delete":
+                    del parent[key]
+                elif op == "replace":
+                    if isinstance(parent, list) and isinstance(value, dict):
+                        # list entries keep their keys when they are replaced
+                        value = dict(value, **{name: val for name, val in elements[-1][1]})
+                    parent[key] = copy.deepcopy(value)
+                else:
+                    parent[key] = _merge(parent[key] if isinstance(parent, list) else parent.get(key), value)
+        self.notify(elements)
+
+    def notify(self, elements: tuple):
+        for subscriber in list(self.subscribers):
+            subscriber.put(elements)
+
+
+class SimulatorServicer(gnmi_pb2_grpc.gNMIServicer):
+    """
+    gNMI service of a simulated target.
+    """
+
+    def __init__(self, simulator: "GnmiSimulator", node: SimulatedNode):
+        self.simulator = simulator
+        self.node = node
+
+    def Capabilities(self, request, context):
+        self.simulator.delay()
+        return gnmi_pb2.CapabilityResponse(
+            supported_models=[
+                gnmi_pb2.ModelData(name="openconfig-interfaces", organization="OpenConfig working group")
+            ],
+            supported_encodings=[gnmi_pb2.Encoding.JSON, gnmi_pb2.Encoding.JSON_IETF],
+            gNMI_version=GNMI_VERSION,
+        )
+
+    def Get(self, request, context):
+        self.simulator.delay()
+        notifications = []
+        for path in request.path or [gnmi_pb2.Path()]:
+            data = self.node.get(_elements(path, request.prefix))
+            update = [gnmi_pb2.Update(path=path, val=_encode(data))] if data is not None else []
+            notifications.append(
+                gnmi_pb2.Notification(timestamp=time.time_ns(), prefix=request.prefix, update=update)
+            )
+        return gnmi_pb2.GetResponse(notification=notifications)
+
+    def Set(self, request, context):
+        self.simulator.delay()
+        results = []
+        try:
+            for path in request.delete:
+                self.node.set("delete", _elements(path, request.prefix))
+                results.append(gnmi_pb2.UpdateResult(path=path, op=gnmi_pb2.UpdateResult.DELETE))
+            for update in request.replace:
+                self.node.set("replace", _elements(update.path, request.prefix), _decode(update.val))
+                results.append(gnmi_pb2.UpdateResult(path=update.path, op=gnmi_pb2.UpdateResult.REPLACE))
+            for update in request.update:
+                self.node.set("update", _elements(update.path, request.prefix), _decode(update.val))
+                results.append(gnmi_pb2.UpdateResult(path=update.path, op=gnmi_pb2.UpdateResult.UPDATE))
+        except Exception as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return gnmi_pb2.SetResponse(prefix=request.prefix, response=results, timestamp=time.time_ns())
+
+    def Subscribe(self, request_iterator, context):
+        request = next(request_iterator).subscribe
+        subscriptions = [
+            (subscription, _elements(subscription.path, request.prefix)) for subscription in request.subscription
+        ]
+        changes = queue.Queue()
+        self.node.subscribers.append(changes)
+        try:
+            if not request.updates_only:
+                yield self._notification(request.prefix, [subscription.path for subscription, _ in subscriptions])
+            yield gnmi_pb2.SubscribeResponse(sync_response=True)
+            if request.mode == gnmi_pb2.SubscriptionList.ONCE:
+                return
+            sample_interval = min(
+                (subscription.sample_interval / 1e9 for subscription, _ in subscriptions
+                 if subscription.mode == gnmi_pb2.SAMPLE and subscription.sample_interval > 0),
+                default=None,
+            )
+            next_sample = time.monotonic() + sample_interval if sample_interval is not None else None
+            while context.is_active():
+                timeout = 1 if next_sample is None else max(0, next_sample - time.monotonic())
+                try:
+                    changed = changes.get(timeout=timeout)
+                except queue.Empty:
+                    changed = None
+                paths = []
+                if changed is not None:
+                    for subscription, elements in subscriptions:
+                        if subscription.mode != gnmi_pb2.SAMPLE and _related(elements, changed):
+                            paths.append(subscription.path)
+                if next_sample is not None and time.monotonic() >= next_sample:
+                    next_sample += sample_interval
+                    paths.extend(
+                        subscription.path for subscription, _ in subscriptions if subscription.mode == gnmi_pb2.SAMPLE
+                    )
+                if paths:
+                    self.simulator.delay()
+                    yield self._notification(request.prefix, paths)
+        finally:
+            self.node.subscribers.remove(changes)
+
+    def _notification(self, prefix, paths: list) -> gnmi_pb2.SubscribeResponse:
+        updates = []
+        for path in paths:
+            data = self.node.get(_elements(path, prefix))
+            if data is not None:
+                updates.append(gnmi_pb2.Update(path=path, val=_encode(data)))
+        return gnmi_pb2.SubscribeResponse(
+            update=gnmi_pb2.Notification(timestamp=time.time_ns(), prefix=prefix, update=updates)
+        )
+
+
+def _related(subscribed: tuple, changed: tuple) -> bool:
+    """
+    Check if a change affects a subscribed path, i.e., one of the paths contains the other.
+    """
+    length = min(len(subscribed), len(changed))
+    return subscribed[:length] == changed[:length]
+
+
+class GnmiSimulator:
+    """
+    Local stand-in for a network of gNMI targets.
+
+    Every simulated node gets its own gRPC server on its own loopback address and the same port, so DigSiNet can
+    connect to them like to containerlab nodes, using the hosts mapping of the gNMI interface credentials. Every
+    server has its own thread pool, so the stream subscriptions of a node, which occupy a worker for their whole
+    lifetime, do not starve the RPCs of other nodes. The pools start their threads on demand, so thousands of nodes
+    can be simulated on a single machine. Each RPC can be delayed
+    to emulate network and device latency and random leaves of the nodes' trees can be changed at a given rate to
+    emulate a live network.
+
+    Attributes:
+        nodes (dict): the simulated nodes by hostname
+        port (int): gNMI port of all nodes
+        latency (float): delay of every RPC in seconds
+        latency_jitter (float): maximum random delay in seconds added to the latency
+        change_rate (float): changes per node and second
+        max_workers (int): threads serving the RPCs of every node
+    """
+
+    def __init__(
+        self,
+        hostnames: list,
+        port: int,
+        tree: dict = None,
+        latency: float = 0,
+        latency_jitter: float = 0,
+        change_rate: float = 0,
+        max_workers: int = 64,
+        base_address: str = BASE_ADDRESS,
+        logger=None,
+    ):
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.change_rate = change_rate
+        self.max_workers = max_workers
+        self.logger = logger
+        tree = tree if tree is not None else default_tree()
+        address = ipaddress.ip_address(base_address)
+        self.nodes = dict()
+        for index, hostname in enumerate(hostnames):
+            self.nodes[hostname] = SimulatedNode(hostname, str(address + index), copy.deepcopy(tree))
+        self.executors = []
+        self.servers = []
+        self.running = threading.Event()
+        self.changer = None
+
+    def hosts(self) -> dict:
+        """
+        Get the addresses of the simulated nodes, to be used as hosts mapping of the gNMI interface credentials.
+
+        :return: A dict of the addresses by hostname.
+        """
+        return {hostname: node.address for hostname, node in self.nodes.items()}
+
+    def start(self):
+        """
+        Start the gRPC servers of all nodes and the thread changing their trees.
+        """
+        for node in self.nodes.values():
+            # a stream subscription occupies a worker for its whole lifetime, RPCs beyond the workers are rejected
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"gNMI {node.name}")
+            server = grpc.server(executor, maximum_concurrent_rpcs=self.max_workers)
+            gnmi_pb2_grpc.add_gNMIServicer_to_server(SimulatorServicer(self, node), server)
+            server.add_insecure_port(f"{node.address}:{self.port}")
+            server.start()
+            self.executors.append(executor)
+            self.servers.append(server)
+        self.running.set()
+        if self.change_rate > 0:
+            self.changer = threading.Thread(target=self._change, name="gNMI simulator changes", daemon=True)
+            self.changer.start()
+        if self.logger is not None:
+            self.logger.info(f"Simulating {len(self.nodes)} gNMI targets on port {self.port}")
+
+    def stop(self):
+        """
+        Stop all servers.
+        """
+        self.running.clear()
+        for server in self.servers:
+            server.stop(grace=None)
+        self.servers = []
+        for executor in self.executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = []
+
+    def delay(self):
+        if self.latency > 0 or self.latency_jitter > 0:
+            time.sleep(self.latency + random.uniform(0, self.latency_jitter))
+
+    def _change(self):
+        nodes = list(self.nodes.values())
+        # changes of all nodes are spread evenly, so the total rate is change_rate times the number of nodes
+        interval = 1 / (self.change_rate * len(nodes))
+        next_change = time.monotonic()
+        while self.running.is_set():
+            node = random.choice(nodes)
+            with node.lock:
+                interfaces = _resolve(node.tree, (("interfaces", ()), ("interface", ())))
+            if interfaces:
+                interface = random.choice(interfaces)["name"]
+                elements = (("interfaces", ()), ("interface", (("name", interface),)), ("config", ()))
+                node.set("update", elements, {"description": f"changed at {time.time()}"})
+            next_change += interval
+            time.sleep(max(0, next_change - time.monotonic()))